@@ -36,3 +36,32 @@ def load_raw_text_data(file_path):
         data = f.read()
     
     return data
+
+def iter_raw_text_lines(file_path, skip_empty=True):
+    """
+    Lazily yields the lines of a text file, one document per line.
+
+    Unlike load_raw_text_data, the file is never held in memory as a whole,
+    so the generator can be passed straight to Vectorizer.fit/partial_fit for
+    corpora larger than RAM.
+
+    Args:
+        file_path (str): The path to the text file.
+        skip_empty (bool): Whether to skip blank lines.
+
+    Returns:
+        Iterator[str]: The lines of the file without their trailing newline.
+    """
+    # Check eagerly so a missing file fails here rather than on first iteration
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Text file not found at: {file_path}")
+
+    def _lines():
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if skip_empty and not line.strip():
+                    continue
+                yield line
+
+    return _lines()
@@ -1,5 +1,63 @@
+import copy
 from abc import ABC, abstractmethod
-from typing import List
+from array import array
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Pattern, Union
+from src.core.parallel import effective_n_jobs, parallel_transform, serial_transform
+
+if TYPE_CHECKING:
+    # Only needed for annotations; the concrete modules import them
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    from src.core.vocabulary import Vocabulary
+
+class TokenSpans(NamedTuple):
+    """
+    Tokens of a text together with their character offsets.
+
+    starts[i] and ends[i] delimit tokens[i] in the original text, i.e. the
+    token is text[starts[i]:ends[i]] after the tokenizer's normalization
+    (such as lowercasing).
+    """
+    tokens: List[str]
+    starts: array
+    ends: array
+
+
+def find_lowercase_spans(pattern: Pattern, text: str) -> TokenSpans:
+    """
+    Finds the matches of a pattern in text.lower(), as tokenize() does, and
+    returns them with their offsets in the original text.
+
+    Matching the lowercased text guarantees the tokens equal those of
+    findall(text.lower()) even for case-sensitive patterns. When lowercasing
+    keeps the length, offsets carry over unchanged; otherwise (a few
+    characters such as 'İ' lowercase to two) each token's span covers the
+    original characters it was lowercased from.
+    """
+    lowered = text.lower()
+    tokens = []
+    starts = array('i')
+    ends = array('i')
+    if len(lowered) == len(text):
+        for match in pattern.finditer(lowered):
+            start, end = match.span()
+            tokens.append(match.group())
+            starts.append(start)
+            ends.append(end)
+        return TokenSpans(tokens, starts, ends)
+
+    # origin[j] is the index of the original character that lowered[j] came from
+    origin = array('i')
+    for i, char in enumerate(text):
+        origin.extend([i] * len(char.lower()))
+    origin.append(len(text))
+    for match in pattern.finditer(lowered):
+        start, end = match.span()
+        tokens.append(match.group())
+        starts.append(origin[start])
+        ends.append(origin[end - 1] + 1 if end > start else origin[start])
+    return TokenSpans(tokens, starts, ends)
 
 class Tokenizer(ABC):
     """
@@ -19,23 +77,142 @@ class Tokenizer(ABC):
         """
         pass
 
+    def tokenize_batch(self, texts: Iterable[str]) -> List[List[str]]:
+        """
+        Tokenizes several strings at once.
+
+        Subclasses can override this to amortize per-call overhead; the
+        default simply calls tokenize() on each text.
+
+        Args:
+            texts: The input strings to tokenize.
+
+        Returns:
+            A list holding the list of tokens of each text, in order.
+        """
+        return [self.tokenize(text) for text in texts]
+
+    def get_params(self) -> Dict[str, Any]:
+        """
+        Returns the JSON-serializable constructor arguments that recreate this
+        tokenizer, used when saving a TextPipeline.
+        """
+        return {}
+
+    def tokenize_iter(self, texts: Iterable[str], batch_size: int = 1024) -> Iterator[List[str]]:
+        """
+        Lazily tokenizes an iterable of strings, calling tokenize_batch() once
+        per chunk of batch_size texts.
+
+        Args:
+            texts: The input strings to tokenize; may be a generator.
+            batch_size: The number of texts handed to tokenize_batch() at a time.
+
+        Yields:
+            The list of tokens of each text, in order.
+        """
+        texts = iter(texts)
+        while True:
+            chunk = list(islice(texts, batch_size))
+            if not chunk:
+                return
+            yield from self.tokenize_batch(chunk)
+
+    def encode(self, texts: Iterable[str], vocabulary: "Vocabulary", add: bool = False) -> List[array]:
+        """
+        Tokenizes texts and maps each token to its integer ID.
+
+        Args:
+            texts: The input strings to encode.
+            vocabulary: The Vocabulary that assigns token IDs.
+            add: If True, unseen tokens are added to the vocabulary and token
+                frequencies are counted; otherwise the vocabulary is unchanged
+                and unknown tokens are handled by Vocabulary.encode().
+
+        Returns:
+            One array('i') of token IDs per text.
+        """
+        encode = vocabulary.add_document if add else vocabulary.encode
+        return [encode(tokens) for tokens in self.tokenize_iter(texts)]
+
 class Vectorizer(ABC):
     """
     Abstract base class for a vectorizer.
+
+    Attributes:
+        sparse_output: Whether transform() returns a scipy.sparse.csr_matrix
+            (one row per document) instead of a list of lists. Consumers such as
+            TextClassifier and TextClusterer pass sparse matrices straight to
+            scikit-learn without densifying them.
+        n_jobs: The number of worker processes transform() shards documents
+            across; 1 runs serially and -1 uses every CPU. Each transform()
+            call starts its own process pool, so values above 1 are meant for
+            large one-off batches rather than many small requests.
     """
 
+    sparse_output: bool = False
+    n_jobs: int = 1
+
     @abstractmethod
-    def fit(self, corpus: List[str]) -> None:
+    def fit(self, corpus: Iterable[str]) -> None:
         """
-        Learns the vocabulary from a list of documents.
+        Learns the vocabulary from a collection of documents.
 
         Args:
-            corpus: A list of strings (documents).
+            corpus: A list or any other iterable of strings (documents), e.g. a
+                generator streaming lines from a file. It is consumed once.
+        """
+        pass
+
+    @abstractmethod
+    def partial_fit(self, corpus: Iterable[str]) -> None:
+        """
+        Updates the learned state with another batch of documents without
+        forgetting what previous fit()/partial_fit() calls have seen.
+
+        Args:
+            corpus: An iterable of strings (documents).
+        """
+        pass
+
+    def serial_copy(self) -> "Vectorizer":
+        """
+        Returns a shallow copy that transforms in the current process
+        (n_jobs=1), e.g. to ship to worker processes. State that fit() or
+        partial_fit() left to be rebuilt lazily is brought up to date on this
+        vectorizer first, so the work is neither repeated by every copy nor
+        lost with them. The copy is only meant for transform().
+        """
+        serial = copy.copy(self)
+        serial.n_jobs = 1
+        return serial
+
+    def get_params(self) -> Dict[str, Any]:
+        """
+        Returns the JSON-serializable constructor arguments, other than the
+        tokenizer, that recreate this vectorizer.
+        """
+        return {"sparse": self.sparse_output, "n_jobs": self.n_jobs}
+
+    @abstractmethod
+    def get_state(self) -> Dict[str, "np.ndarray"]:
+        """
+        Returns the fitted state as named NumPy arrays, so it can be saved as
+        .npy files and memory-mapped back by set_state().
+        """
+        pass
+
+    @abstractmethod
+    def set_state(self, arrays: Dict[str, "np.ndarray"]) -> None:
+        """
+        Restores the fitted state from arrays returned by get_state(). The
+        arrays may be read-only memory maps and are used without copying
+        where possible.
         """
         pass
 
     @abstractmethod
-    def transform(self, documents: List[str]) -> List[List[int]]:
+    def transform(self, documents: List[str]) -> Union[List[List[int]], "csr_matrix"]:
         """
         Transforms documents into a list of vectors.
 
@@ -43,19 +220,30 @@ class Vectorizer(ABC):
             documents: A list of strings to transform.
 
         Returns:
-            A list of lists, where each inner list is a document vector.
+            A list of lists, where each inner list is a document vector,
+            or a csr_matrix of shape (n_documents, vocab_size) if sparse_output is set.
         """
         pass
 
-    def fit_transform(self, corpus: List[str]) -> List[List[int]]:
+    def fit_transform(self, corpus: Iterable[str], n_jobs: Optional[int] = None) -> Union[List[List[int]], "csr_matrix"]:
         """
         Fits the model on the corpus and then transforms it.
 
         Args:
-            corpus: A list of strings (documents).
+            corpus: A list of strings (documents). One-shot iterators are
+                materialized first since the corpus is read twice.
+            n_jobs: The number of processes for the transform step; defaults
+                to the vectorizer's own n_jobs setting.
 
         Returns:
-            A list of lists, where each inner list is a document vector.
+            A list of lists, where each inner list is a document vector,
+            or a csr_matrix if sparse_output is set.
         """
+        if iter(corpus) is corpus:
+            corpus = list(corpus)
         self.fit(corpus)
-        return self.transform(corpus)
+        if n_jobs is None:
+            n_jobs = self.n_jobs
+        if effective_n_jobs(n_jobs) > 1:
+            return parallel_transform(self, corpus, n_jobs)
+        return serial_transform(self, corpus)
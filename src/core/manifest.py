@@ -0,0 +1,40 @@
+import json
+import os
+from typing import Any, Dict
+
+
+def write_manifest(path: str, manifest: Dict[str, Any], format_version: int) -> None:
+    """
+    Writes a JSON manifest that records the format version of a saved directory.
+
+    Savers call this after writing every file the manifest describes, so a
+    directory whose save was interrupted has no manifest and cannot be loaded.
+
+    Args:
+        path: The manifest file to write.
+        manifest: The JSON-serializable fields describing the saved files.
+        format_version: The version of the saved layout, checked by read_manifest().
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"format_version": format_version, **manifest}, f, indent=2)
+
+
+def read_manifest(path: str, expected_version: int) -> Dict[str, Any]:
+    """
+    Reads a manifest written by write_manifest() and checks its format version.
+
+    Args:
+        path: The manifest file.
+        expected_version: The only format version the caller can load.
+
+    Returns:
+        The manifest as a dict, including "format_version".
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Manifest not found at: {path}")
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != expected_version:
+        raise ValueError(f"Unsupported format version {manifest.get('format_version')} in {path} "
+                         f"(expected {expected_version}).")
+    return manifest
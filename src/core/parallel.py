@@ -0,0 +1,92 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional
+
+from scipy.sparse import issparse, vstack
+
+# The fitted vectorizer of the current worker process, set once per pool by
+# its initializer so the vocabulary is not re-sent with every chunk.
+_worker_vectorizer = None
+
+
+def effective_n_jobs(n_jobs: Optional[int]) -> int:
+    """
+    Resolves an n_jobs setting to a number of worker processes.
+
+    Args:
+        n_jobs: None or 1 for serial execution, a positive count, or a negative
+            value meaning "all CPUs but (|n_jobs| - 1)", so -1 uses every CPU.
+
+    Returns:
+        The number of processes to use (at least 1).
+    """
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+def _init_worker(vectorizer) -> None:
+    global _worker_vectorizer
+    _worker_vectorizer = vectorizer
+
+
+def _transform_chunk(documents: List[str]):
+    return _worker_vectorizer.transform(documents)
+
+
+def serial_transform(vectorizer, documents: Iterable[str]):
+    """
+    Transforms documents in the current process, whatever the vectorizer's
+    own n_jobs setting.
+    """
+    if effective_n_jobs(vectorizer.n_jobs) <= 1:
+        return vectorizer.transform(documents)
+    return vectorizer.serial_copy().transform(documents)
+
+
+def parallel_transform(vectorizer, documents: Iterable[str], n_jobs: int, chunk_size: Optional[int] = None):
+    """
+    Transforms documents with a fitted vectorizer across a process pool.
+
+    Every call starts (and shuts down) its own pool, and each worker receives
+    a serial copy of the vectorizer once, at start-up; the documents are split
+    into contiguous chunks and the per-chunk results are stacked back in
+    order. Rows are computed independently, so the output is identical to a
+    serial transform().
+
+    Starting the pool and shipping the vectorizer to it costs far more than
+    transforming a small batch, so this only pays off for large one-off
+    batches; vectorizers that serve many small requests (e.g. behind
+    TextPipeline.process_batch) should keep n_jobs=1.
+
+    Args:
+        vectorizer: A fitted Vectorizer.
+        documents: The documents to transform.
+        n_jobs: The number of worker processes (see effective_n_jobs).
+        chunk_size: Documents per chunk; defaults to about four chunks per worker.
+
+    Returns:
+        A csr_matrix if the vectorizer produces sparse output, else a list of lists.
+    """
+    documents = list(documents)
+    n_workers = min(effective_n_jobs(n_jobs), len(documents))
+    if n_workers <= 1:
+        return serial_transform(vectorizer, documents)
+    serial = vectorizer.serial_copy()
+
+    if chunk_size is None:
+        chunk_size = -(-len(documents) // (n_workers * 4))
+    chunks = [documents[i:i + chunk_size] for i in range(0, len(documents), chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(serial,)) as executor:
+        shards = list(executor.map(_transform_chunk, chunks))
+
+    if issparse(shards[0]):
+        return vstack(shards, format="csr")
+
+    doc_vectors = []
+    for shard in shards:
+        doc_vectors.extend(shard)
+    return doc_vectors
@@ -0,0 +1,379 @@
+import json
+import os
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Union
+import numpy as np
+
+
+class Vocabulary:
+    """
+    Interns tokens to contiguous integer IDs and tracks how often they occur.
+
+    IDs are assigned in order of first appearance, starting at 0, so a token's
+    ID can index directly into NumPy arrays or array('i') buffers. Term and
+    document frequencies are kept alongside so that rare or overly common
+    tokens can be pruned.
+    """
+
+    def __init__(self, tokens: Iterable[str] = (), unk_token: Optional[str] = None):
+        """
+        Args:
+            tokens: Initial tokens to intern, in ID order.
+            unk_token: An optional token that unknown tokens are encoded as.
+                If None, unknown tokens are dropped by encode().
+        """
+        self._token_to_id: Dict[str, int] = {}
+        self._id_to_token: List[str] = []
+        self.counts = array('q')       # Term frequency per ID
+        self.doc_counts = array('q')   # Document frequency per ID
+        self.num_docs = 0
+        self.unk_token = unk_token
+        if unk_token is not None:
+            self.add(unk_token)
+        for token in tokens:
+            self.add(token)
+
+    def __len__(self) -> int:
+        return len(self._id_to_token)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._token_to_id
+
+    def __getitem__(self, token: str) -> int:
+        return self._token_to_id[token]
+
+    def __iter__(self):
+        return iter(self._id_to_token)
+
+    @property
+    def unk_id(self) -> Optional[int]:
+        """The ID of unk_token, or None if there is none."""
+        return None if self.unk_token is None else self._token_to_id[self.unk_token]
+
+    def get(self, token: str, default: Optional[int] = None) -> Optional[int]:
+        """
+        Returns the ID of a token, or default if it is not in the vocabulary.
+        """
+        return self._token_to_id.get(token, default)
+
+    def lookup_token(self, token_id: int) -> str:
+        """
+        Returns the token with the given ID.
+        """
+        return self._id_to_token[token_id]
+
+    def add(self, token: str) -> int:
+        """
+        Interns a token without counting it.
+
+        Returns:
+            The token's ID, newly assigned if it was not in the vocabulary.
+        """
+        token_id = self._token_to_id.get(token)
+        if token_id is None:
+            token_id = len(self._id_to_token)
+            self._token_to_id[token] = token_id
+            self._id_to_token.append(token)
+            self.counts.append(0)
+            self.doc_counts.append(0)
+        return token_id
+
+    def add_document(self, tokens: Iterable[str]) -> array:
+        """
+        Interns the tokens of one document and updates their frequencies.
+
+        Returns:
+            The document encoded as an array('i') of IDs.
+        """
+        token_to_id = self._token_to_id
+        counts = self.counts
+        ids = array('i')
+        for token in tokens:
+            token_id = token_to_id.get(token)
+            if token_id is None:
+                token_id = self.add(token)
+            counts[token_id] += 1
+            ids.append(token_id)
+        for token_id in set(ids):
+            self.doc_counts[token_id] += 1
+        self.num_docs += 1
+        return ids
+
+    def update(self, other: "Vocabulary") -> np.ndarray:
+        """
+        Merges another vocabulary into this one, adding its tokens and
+        summing its frequencies.
+
+        Returns:
+            An int32 array mapping each ID of other to its ID in this vocabulary.
+        """
+        mapping = np.fromiter((self.add(token) for token in other), dtype=np.int32, count=len(other))
+        for other_id, token_id in enumerate(mapping.tolist()):
+            self.counts[token_id] += other.counts[other_id]
+            self.doc_counts[token_id] += other.doc_counts[other_id]
+        self.num_docs += other.num_docs
+        return mapping
+
+    def encode(self, tokens: Iterable[str]) -> array:
+        """
+        Encodes tokens as an array('i') of IDs without changing the vocabulary.
+
+        Unknown tokens map to unk_token's ID, or are dropped if there is none.
+        """
+        token_to_id = self._token_to_id
+        unk_id = self.unk_id
+        ids = array('i')
+        for token in tokens:
+            token_id = token_to_id.get(token, unk_id)
+            if token_id is not None:
+                ids.append(token_id)
+        return ids
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        """
+        Maps IDs back to their tokens.
+        """
+        id_to_token = self._id_to_token
+        return [id_to_token[token_id] for token_id in ids]
+
+    def prune(self, min_df: Union[int, float] = 1, max_df: Union[int, float] = 1.0,
+              max_features: Optional[int] = None) -> "Vocabulary":
+        """
+        Builds a smaller vocabulary keeping only tokens within the given
+        document-frequency bounds.
+
+        Args:
+            min_df: Minimum document frequency, as a count (int) or as a
+                fraction of num_docs (float).
+            max_df: Maximum document frequency, as a count (int) or as a
+                fraction of num_docs (float).
+            max_features: If set, keep at most this many tokens, preferring
+                the highest term frequencies.
+
+        Returns:
+            A new Vocabulary with contiguous IDs, in the original ID order,
+            and the retained frequency counts. unk_token is always kept.
+        """
+        min_count = min_df if isinstance(min_df, int) else min_df * self.num_docs
+        max_count = max_df if isinstance(max_df, int) else max_df * self.num_docs
+        if min_count > max_count:
+            raise ValueError("max_df corresponds to fewer documents than min_df.")
+
+        unk_id = self.unk_id
+        keep = [token_id for token_id in range(len(self))
+                if token_id != unk_id and min_count <= self.doc_counts[token_id] <= max_count]
+        if max_features is not None and len(keep) > max_features:
+            # Highest term frequency first; ties broken by the earlier ID
+            keep = sorted(keep, key=lambda token_id: (-self.counts[token_id], token_id))[:max_features]
+            keep.sort()
+
+        pruned = Vocabulary(unk_token=self.unk_token)
+        pruned.num_docs = self.num_docs
+        if unk_id is not None:
+            pruned.counts[0] = self.counts[unk_id]
+            pruned.doc_counts[0] = self.doc_counts[unk_id]
+        for token_id in keep:
+            new_id = pruned.add(self._id_to_token[token_id])
+            pruned.counts[new_id] = self.counts[token_id]
+            pruned.doc_counts[new_id] = self.doc_counts[token_id]
+        return pruned
+
+    def save(self, path: str) -> None:
+        """
+        Writes the vocabulary and its frequencies to a JSON file.
+        """
+        state = {
+            "tokens": self._id_to_token,
+            "counts": self.counts.tolist(),
+            "doc_counts": self.doc_counts.tolist(),
+            "num_docs": self.num_docs,
+            "unk_token": self.unk_token,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "Vocabulary":
+        """
+        Reads a vocabulary written by save().
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Vocabulary file not found at: {path}")
+
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+        vocabulary = cls(state["tokens"])
+        vocabulary.unk_token = state["unk_token"]
+        vocabulary.counts = array('q', state["counts"])
+        vocabulary.doc_counts = array('q', state["doc_counts"])
+        vocabulary.num_docs = state["num_docs"]
+        return vocabulary
+
+
+def pack_tokens(tokens: List[str]):
+    """
+    Packs tokens into flat arrays that MappedVocabulary can read in place.
+
+    Returns:
+        A tuple (blob, offsets, sorted_ids): the UTF-8 bytes of all tokens back
+        to back as uint8, the int64 start of each token in the blob plus the
+        end of the last one, and the int32 token IDs in sorted token order.
+    """
+    encoded = [token.encode("utf-8") for token in tokens]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    sorted_ids = np.array(sorted(range(len(tokens)), key=tokens.__getitem__), dtype=np.int32)
+    return blob, offsets, sorted_ids
+
+
+def unpack_tokens(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """
+    Decodes all tokens packed by pack_tokens(), in ID order.
+    """
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[start:end].decode("utf-8") for start, end in zip(bounds, bounds[1:])]
+
+
+def map_packed_tokens(blob: np.ndarray, offsets: np.ndarray,
+                      sorted_ids: Optional[np.ndarray] = None) -> "MappedVocabulary":
+    """
+    Returns a MappedVocabulary over tokens packed by pack_tokens(), without
+    decoding them. sorted_ids is rebuilt from the tokens if it is missing
+    (e.g. from states saved without it).
+    """
+    if sorted_ids is None:
+        _, _, sorted_ids = pack_tokens(unpack_tokens(blob, offsets))
+    return MappedVocabulary(blob, offsets, sorted_ids)
+
+
+class MappedVocabulary:
+    """
+    A read-only Vocabulary over the packed arrays produced by pack_tokens().
+
+    The arrays are typically views of a memory-mapped file, so opening a large
+    vocabulary costs nothing up front: tokens are decoded from the blob on
+    demand and token IDs are found by binary search over sorted_ids. Recent
+    lookups (including misses) are kept in a bounded, thread-safe LRU cache,
+    so the private memory of a long-running process does not grow with the
+    number of distinct tokens it is asked about.
+    """
+
+    def __init__(self, blob, offsets, sorted_ids, unk_token: Optional[str] = None,
+                 cache_size: int = 65536):
+        """
+        Args:
+            blob, offsets, sorted_ids: The arrays returned by pack_tokens().
+            unk_token: The token unknown tokens encode to, if any.
+            cache_size: How many token lookups to memoize; 0 disables the cache.
+        """
+        self._blob = blob
+        self._offsets = offsets
+        self._sorted_ids = sorted_ids
+        self.unk_token = unk_token
+        self.cache_size = cache_size
+        self._bind()
+
+    def __getstate__(self) -> dict:
+        # The cache and the memoryviews cannot be pickled; rebuild them instead
+        state = self.__dict__.copy()
+        for name in ("_find", "_blob_view", "_offsets_view", "_sorted_ids_view"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._bind()
+
+    def _bind(self) -> None:
+        # Memoryviews index to plain bytes and ints, which keeps the binary
+        # search free of NumPy scalar overhead
+        self._blob_view = memoryview(self._blob)
+        self._offsets_view = memoryview(self._offsets)
+        self._sorted_ids_view = memoryview(self._sorted_ids)
+        cache_size = self.cache_size
+        self._find = lru_cache(maxsize=cache_size)(self._search) if cache_size > 0 else self._search
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __contains__(self, token: str) -> bool:
+        return self.get(token) is not None
+
+    def __getitem__(self, token: str) -> int:
+        token_id = self.get(token)
+        if token_id is None:
+            raise KeyError(token)
+        return token_id
+
+    def __iter__(self):
+        return (self.lookup_token(token_id) for token_id in range(len(self)))
+
+    @property
+    def unk_id(self) -> Optional[int]:
+        """The ID of unk_token, or None if there is none."""
+        return None if self.unk_token is None else self.get(self.unk_token)
+
+    def lookup_token(self, token_id: int) -> str:
+        """
+        Returns the token with the given ID.
+        """
+        start, end = self._offsets[token_id], self._offsets[token_id + 1]
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+    def get(self, token: str, default: Optional[int] = None) -> Optional[int]:
+        """
+        Returns the ID of a token, or default if it is not in the vocabulary.
+        """
+        token_id = self._find(token)
+        return default if token_id is None else token_id
+
+    def _search(self, token: str) -> Optional[int]:
+        """
+        Binary-searches sorted_ids for a token. UTF-8 preserves code point
+        order, so comparing the encoded bytes matches the sorted str order.
+        """
+        key = token.encode("utf-8")
+        blob, offsets, sorted_ids = self._blob_view, self._offsets_view, self._sorted_ids_view
+        lo, hi = 0, len(sorted_ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            token_id = sorted_ids[mid]
+            candidate = blob[offsets[token_id]:offsets[token_id + 1]].tobytes()
+            if candidate < key:
+                lo = mid + 1
+            elif candidate > key:
+                hi = mid
+            else:
+                return token_id
+        return None
+
+    def encode(self, tokens: Iterable[str]) -> array:
+        """
+        Encodes tokens as an array('i') of IDs (see Vocabulary.encode).
+        """
+        unk_id = self.unk_id
+        ids = array('i')
+        for token in tokens:
+            token_id = self.get(token, unk_id)
+            if token_id is not None:
+                ids.append(token_id)
+        return ids
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        """
+        Maps IDs back to their tokens.
+        """
+        return [self.lookup_token(token_id) for token_id in ids]
+
+    def to_vocabulary(self) -> Vocabulary:
+        """
+        Copies the tokens into a regular, growable Vocabulary.
+        """
+        vocabulary = Vocabulary(unk_token=self.unk_token)
+        for token in self:
+            vocabulary.add(token)
+        return vocabulary
@@ -0,0 +1,46 @@
+from typing import Optional
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+def smoothed_idf(doc_freq: np.ndarray, num_docs: int) -> np.ndarray:
+    """
+    Computes the IDF weight of each term from its document frequency.
+
+    Args:
+        doc_freq: The number of documents each term occurs in.
+        num_docs: The number of documents seen.
+
+    Returns:
+        A float64 array with log(num_docs / (doc_freq + 1)) + 1 per term.
+    """
+    # Add 1 for smoothing, and 1 to the result to avoid zero IDF
+    return np.log(num_docs / (np.asarray(doc_freq, dtype=np.float64) + 1)) + 1
+
+
+def csr_row_norms(X: csr_matrix) -> np.ndarray:
+    """
+    Returns the L2 norm of each row of a CSR matrix, touching only its stored entries.
+    """
+    row_ids = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+    return np.sqrt(np.bincount(row_ids, weights=X.data * X.data, minlength=X.shape[0]))
+
+
+def l2_normalize_rows(X: csr_matrix, norms: Optional[np.ndarray] = None) -> csr_matrix:
+    """
+    Returns a float CSR matrix with the rows of X scaled to unit L2 norm.
+
+    Args:
+        X: A csr_matrix with float data.
+        norms: The row norms of X, if already computed by csr_row_norms().
+
+    Returns:
+        A new csr_matrix sharing X's indices; all-zero rows stay zero.
+    """
+    if norms is None:
+        norms = csr_row_norms(X)
+    else:
+        norms = norms.copy()
+    norms[norms == 0] = 1.0 # Leave all-zero rows untouched
+    data = X.data / np.repeat(norms, np.diff(X.indptr))
+    return csr_matrix((data, X.indices, X.indptr), shape=X.shape)
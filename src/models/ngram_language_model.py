@@ -1,48 +1,83 @@
-from collections import defaultdict
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional, Tuple, Union
+import math
 import random
+import numpy as np
 from src.core.interfaces import Tokenizer
+from src.core.parallel import effective_n_jobs
+from src.models.ngram_sampling import AliasTable, BackoffSampler, LRUCache
+from src.models.ngram_smoothing import SMOOTHING_METHODS, BackoffScorer
+from src.models.ngram_storage import ArrayNgramStore, DictNgramStore, count_ngrams_parallel, pad_tokens
+
+STORAGE_ENGINES = {
+    "dict": DictNgramStore,
+    "array": ArrayNgramStore,
+}
 
 class NgramLanguageModel:
     """
     A simple N-gram language model for predicting the next word.
     """
 
-    def __init__(self, tokenizer: Tokenizer, n: int = 2):
+    def __init__(self, tokenizer: Tokenizer, n: int = 2, storage: str = "dict",
+                 smoothing: Optional[str] = None, sampler_cache_size: int = 1000000):
         """
         Initializes the N-gram language model.
 
         Args:
             tokenizer: A Tokenizer instance.
             n: The 'n' for the N-gram (e.g., 2 for bigram, 3 for trigram).
+            storage: How counts are stored: "dict" keeps nested dictionaries of
+                strings, "array" keeps sorted integer arrays that use an order
+                of magnitude less memory (see ngram_storage).
+            smoothing: None for unsmoothed relative frequencies, or
+                "kneser_ney" / "stupid_backoff" to back off through all orders
+                so that unseen contexts still get a distribution.
+            sampler_cache_size: How many outcomes, summed over all cached
+                per-context sampling tables, generate_text keeps (least
+                recently used tables are evicted first).
         """
         if n < 1:
             raise ValueError("N must be at least 1.")
+        if storage not in STORAGE_ENGINES:
+            raise ValueError(f"Unknown storage '{storage}'. Choose from: {list(STORAGE_ENGINES)}")
+        if smoothing is not None and smoothing not in SMOOTHING_METHODS:
+            raise ValueError(f"Unknown smoothing '{smoothing}'. Choose from: {list(SMOOTHING_METHODS)}")
         self._tokenizer = tokenizer
         self._n = n
-        self._ngram_counts = defaultdict(lambda: defaultdict(int))
-        self._context_counts = defaultdict(int)
-        self._vocabulary = set()
+        self._store = STORAGE_ENGINES[storage](n)
+        self._smoothing = smoothing
+        # Scorers built from the current counts, by smoothing method
+        self._scorers: Dict[str, BackoffScorer] = {}
+        # Tables for sampling the next word, by context
+        self._samplers: LRUCache = LRUCache(sampler_cache_size)
 
-    def fit(self, corpus: List[str]) -> None:
+    def fit(self, corpus: Iterable[str], n_jobs: int = 1, shard_size: int = 10000,
+            verbose: bool = False) -> None:
         """
         Trains the language model on the given corpus.
 
         Args:
-            corpus: A list of text documents.
+            corpus: A list (or any iterable) of text documents.
+            n_jobs: The number of worker processes to count n-grams in; values
+                other than 1 require storage="array". -1 uses every CPU.
+            shard_size: Documents per worker task when n_jobs is not 1.
+            verbose: If True, report progress and throughput after each shard
+                when counting in parallel.
         """
-        for doc in corpus:
-            # Add start/end tokens for sentence boundaries
-            tokens = ["<s>"] * (self._n - 1) + self._tokenizer.tokenize(doc) + ["</s>"]
-            self._vocabulary.update(tokens)
-
-            for i in range(len(tokens) - self._n + 1):
-                ngram = tuple(tokens[i : i + self._n])
-                context = ngram[:-1]
-                next_word = ngram[-1]
+        self._scorers = {}
+        self._samplers.clear()
+        if effective_n_jobs(n_jobs) > 1:
+            if not isinstance(self._store, ArrayNgramStore):
+                raise ValueError("Parallel fitting requires storage='array'.")
+            self._store.add_count_tables(count_ngrams_parallel(
+                self._tokenizer, corpus, self._n, n_jobs, shard_size=shard_size, verbose=verbose
+            ))
+            return
 
-                self._ngram_counts[context][next_word] += 1
-                self._context_counts[context] += 1
+        # Add start/end tokens for sentence boundaries
+        self._store.add_sentences(
+            pad_tokens(tokens, self._n) for tokens in self._tokenizer.tokenize_iter(corpus)
+        )
 
     def predict_next_word(self, context: List[str]) -> Dict[str, float]:
         """
@@ -54,51 +89,186 @@ class NgramLanguageModel:
         Returns:
             A dictionary mapping each possible next word to its probability.
         """
-        # Ensure context is of correct length, pad with <s> if necessary
-        if len(context) < self._n - 1:
-            padded_context = ["<s>"] * (self._n - 1 - len(context)) + context
-        else:
-            padded_context = context[-(self._n - 1):]
-        
-        context_tuple = tuple(padded_context)
+        context_tuple = self._context_key(context)
 
-        if context_tuple not in self._context_counts:
+        if self._smoothing is not None:
+            return self._smoothed_distribution(context_tuple)
+
+        continuations = self._store.continuations(context_tuple)
+        if continuations is None:
             # Handle unseen context (return uniform distribution or empty dict)
             # For simplicity, return empty dict for now
             return {}
 
         next_word_probs = {}
-        total_count = self._context_counts[context_tuple]
+        next_words, counts, total_count = continuations
 
-        for next_word, count in self._ngram_counts[context_tuple].items():
+        for next_word, count in zip(next_words, counts):
             next_word_probs[next_word] = count / total_count
         
         return next_word_probs
 
-    def generate_text(self, seed_text: str, length: int = 20) -> str:
+    def top_k_next_words(self, context: List[str], k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Returns the k most likely next words given a context, most likely first.
+
+        Equivalent to sorting predict_next_word() by probability. Without
+        smoothing, the continuations are read off a precomputed ranking (or a
+        heap), so the cost grows with k rather than with the number of
+        possible next words. With smoothing every word has a score, so the
+        full distribution is computed and partitioned: the cost is O(V) in
+        the vocabulary size, like predict_next_word().
+
+        Args:
+            context: A list of previous words (should be n-1 long).
+            k: How many words to return.
+
+        Returns:
+            (word, probability) pairs; without smoothing, empty if the context
+            was never seen.
+        """
+        if k <= 0:
+            return []
+        context_tuple = self._context_key(context)
+
+        if self._smoothing is not None:
+            scorer = self._get_scorer(self._smoothing)
+            scores = scorer.distribution([scorer.vocabulary.get(token, -1) for token in context_tuple])
+            top = np.flatnonzero(scores)
+            if len(top) > k:
+                top = top[np.argpartition(-scores[top], k - 1)[:k]]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return list(zip(scorer.vocabulary.decode(top.tolist()), scores[top].tolist()))
+
+        continuations = self._store.top_continuations(context_tuple, k)
+        if continuations is None:
+            return []
+        next_words, counts, total_count = continuations
+        return [(next_word, count / total_count) for next_word, count in zip(next_words, counts)]
+
+    def _context_key(self, context: List[str]) -> tuple:
+        """
+        Pads or truncates a context to the n-1 words the model conditions on.
+        """
+        # Ensure context is of correct length, pad with <s> if necessary
+        if len(context) < self._n - 1:
+            padded_context = ["<s>"] * (self._n - 1 - len(context)) + context
+        else:
+            padded_context = context[-(self._n - 1):]
+        
+        return tuple(padded_context)
+
+    def _smoothed_distribution(self, context: tuple) -> Dict[str, float]:
+        """
+        Returns the smoothed scores of every vocabulary word after the context.
+        """
+        scorer = self._get_scorer(self._smoothing)
+        context_ids = [scorer.vocabulary.get(token, -1) for token in context]
+        scores = scorer.distribution(context_ids)
+        word_ids = scores.nonzero()[0]
+        return dict(zip(scorer.vocabulary.decode(word_ids.tolist()), scores[word_ids].tolist()))
+
+    def _get_scorer(self, method: str) -> BackoffScorer:
+        """
+        Returns the scorer for a smoothing method, building and caching it on
+        first use after each fit.
+        """
+        scorer = self._scorers.get(method)
+        if scorer is None:
+            store = self._store
+            if isinstance(store, DictNgramStore):
+                store = store.to_array_store()
+            scorer = self._scorers[method] = BackoffScorer(store, method)
+        return scorer
+
+    def score(self, sentence: str, smoothing: Optional[str] = None) -> float:
+        """
+        Computes the log-probability of a sentence, including its end token.
+
+        Args:
+            sentence: The text to score.
+            smoothing: The smoothing method to use; defaults to the model's own,
+                or "kneser_ney" if the model is unsmoothed.
+
+        Returns:
+            The sum of the natural log probabilities of each token given the
+            n-1 tokens before it.
+        """
+        method = smoothing or self._smoothing or "kneser_ney"
+        tokens = pad_tokens(self._tokenizer.tokenize(sentence), self._n)
+        return self._get_scorer(method).log_score(tokens)
+
+    def perplexity(self, corpus: Iterable[str], smoothing: Optional[str] = None) -> float:
+        """
+        Computes the perplexity of the model on held-out text.
+
+        Args:
+            corpus: An iterable of sentences.
+            smoothing: The smoothing method to use (see score()).
+
+        Returns:
+            exp of the negative mean log-probability per predicted token
+            (every token plus one end token per sentence).
+        """
+        scorer = self._get_scorer(smoothing or self._smoothing or "kneser_ney")
+        total_log_prob = 0.0
+        num_tokens = 0
+        for tokens in self._tokenizer.tokenize_iter(corpus):
+            total_log_prob += scorer.log_score(pad_tokens(tokens, self._n))
+            num_tokens += len(tokens) + 1
+        if num_tokens == 0:
+            raise ValueError("Cannot compute perplexity of an empty corpus.")
+        return math.exp(-total_log_prob / num_tokens)
+
+    def _sample_next_word(self, context: tuple, rng) -> Optional[str]:
+        """
+        Draws the next word after a context, or returns None if nothing can
+        follow it. Sampling tables are built on first use and cached.
+        """
+        if self._smoothing is not None:
+            scorer = self._get_scorer(self._smoothing)
+            sampler = BackoffSampler(scorer, self._samplers)
+            word_id = sampler.sample([scorer.vocabulary.get(token, -1) for token in context], rng)
+            return None if word_id is None else scorer.vocabulary.lookup_token(word_id)
+
+        def build() -> Optional[AliasTable]:
+            continuations = self._store.continuations(context)
+            if continuations is None:
+                return None
+            next_words, counts, _ = continuations
+            return AliasTable(next_words, counts)
+
+        table = self._samplers.get_or_build(context, build)
+        return None if table is None else table.sample(rng)
+
+    def generate_text(self, seed_text: str, length: int = 20, rng: Optional[random.Random] = None) -> str:
         """
         Generates text using the trained language model.
 
+        Each step samples from cached alias tables for the current context,
+        so a token costs constant time once its context has been seen.
+
         Args:
             seed_text: The starting text for generation.
             length: The maximum number of words to generate.
+            rng: The random.Random to sample with; defaults to the global
+                random module.
 
         Returns:
             The generated text string.
         """
+        if rng is None:
+            rng = random
         generated_tokens = self._tokenizer.tokenize(seed_text)
         
         for _ in range(length):
             context = generated_tokens[-(self._n - 1):] if self._n > 1 else []
-            next_word_probs = self.predict_next_word(context)
+            # Sample next word based on probabilities
+            next_word = self._sample_next_word(self._context_key(context), rng)
 
-            if not next_word_probs:
+            if next_word is None:
                 break # Cannot predict next word
 
-            # Sample next word based on probabilities
-            words, probs = zip(*next_word_probs.items())
-            next_word = random.choices(words, weights=probs, k=1)[0]
-            
             if next_word == "</s>":
                 break # End of sentence token
 
@@ -107,3 +277,71 @@ class NgramLanguageModel:
         # Remove start-of-sentence tokens if they were added internally
         final_text = " ".join([token for token in generated_tokens if token != "<s>"])
         return final_text
+
+    def generate_batch(self, seed_texts: Union[str, List[str]], num_samples: int = 1,
+                       length: int = 20, seed: Optional[int] = None) -> List[str]:
+        """
+        Generates many texts at once, e.g. for data augmentation.
+
+        All samples share the model's sampling-table cache and one seeded
+        random number generator, so the same seed reproduces the same batch.
+
+        Args:
+            seed_texts: One starting text, or a list of them.
+            num_samples: How many texts to generate per starting text.
+            length: The maximum number of words to generate per text.
+            seed: Seed for the random number generator.
+
+        Returns:
+            The generated texts, num_samples per starting text, in order.
+        """
+        if isinstance(seed_texts, str):
+            seed_texts = [seed_texts]
+        rng = random.Random(seed)
+        return [self.generate_text(seed_text, length, rng=rng)
+                for seed_text in seed_texts for _ in range(num_samples)]
+
+    def save(self, path: str) -> None:
+        """
+        Saves the trained counts to a single binary file.
+
+        Models using dict storage are converted to the array format first.
+        The smoothing method and sampler cache size are recorded with the
+        counts, along with the smoothing tables derived from them, so load()
+        maps those instead of rebuilding them. The tokenizer is not saved;
+        pass an equivalent one to load().
+
+        Args:
+            path: The file to write.
+        """
+        store = self._store
+        if isinstance(store, DictNgramStore):
+            store = store.to_array_store()
+        extra_arrays = self._get_scorer(self._smoothing).get_state() if self._smoothing else None
+        store.save(path, {"smoothing": self._smoothing, "sampler_cache_size": self._samplers.max_size},
+                   extra_arrays)
+
+    @classmethod
+    def load(cls, path: str, tokenizer: Tokenizer) -> "NgramLanguageModel":
+        """
+        Loads a model saved with save(), memory-mapping its arrays.
+
+        Loading is near-instant regardless of model size, and processes that
+        load the same file share one copy of it in the OS page cache.
+
+        Args:
+            path: The file written by save().
+            tokenizer: The Tokenizer the model was trained with.
+
+        Returns:
+            An NgramLanguageModel with array storage and the saved model's
+            smoothing method and sampler cache size.
+        """
+        store = ArrayNgramStore.load(path)
+        model = cls(tokenizer, n=store.n, storage="array",
+                    smoothing=store.metadata.get("smoothing"),
+                    sampler_cache_size=store.metadata.get("sampler_cache_size", 1000000))
+        model._store = store
+        if model._smoothing and store.extra_arrays:
+            model._scorers[model._smoothing] = BackoffScorer(store, model._smoothing, state=store.extra_arrays)
+        return model
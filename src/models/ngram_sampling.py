@@ -0,0 +1,199 @@
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, List, Optional, Sequence, TypeVar
+import numpy as np
+
+T = TypeVar("T")
+
+
+class AliasTable(Generic[T]):
+    """
+    Samples from a fixed discrete distribution in constant time with Walker's
+    alias method (built with Vose's algorithm).
+
+    Each of the k slots holds its own outcome, an alias outcome and the
+    probability of keeping its own; a sample picks a slot uniformly and then
+    one of its two outcomes, using a single random number.
+    """
+
+    __slots__ = ("outcomes", "keep_probabilities", "aliases")
+
+    def __init__(self, outcomes: Sequence[T], weights: Sequence[float]):
+        """
+        Args:
+            outcomes: The values to sample.
+            weights: Non-negative weights (e.g. counts) aligned with outcomes.
+        """
+        k = len(outcomes)
+        total = float(sum(weights))
+        if k == 0 or total <= 0:
+            raise ValueError("AliasTable needs at least one outcome with positive weight.")
+
+        scaled = [weight * k / total for weight in weights]
+        keep = [1.0] * k
+        aliases = list(range(k))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            i = small.pop()
+            j = large[-1]
+            keep[i] = scaled[i]
+            aliases[i] = j
+            # Slot j gives away the rest of slot i's space
+            scaled[j] -= 1.0 - scaled[i]
+            if scaled[j] < 1.0:
+                large.pop()
+                small.append(j)
+        # Whatever is left is 1 up to rounding error and keeps its own outcome
+
+        self.outcomes: List[T] = list(outcomes)
+        self.keep_probabilities = keep
+        self.aliases = aliases
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    def sample(self, rng) -> T:
+        """
+        Draws one outcome.
+
+        Args:
+            rng: A random.Random instance, or the random module itself.
+        """
+        k = len(self.outcomes)
+        u = rng.random() * k
+        slot = min(int(u), k - 1)
+        if u - slot < self.keep_probabilities[slot]:
+            return self.outcomes[slot]
+        return self.outcomes[self.aliases[slot]]
+
+
+class CumulativeTable:
+    """
+    Samples integer outcomes in O(log k) by binary search over cumulative
+    weights. Cheaper to build than an AliasTable from a NumPy weight vector.
+    """
+
+    __slots__ = ("outcomes", "cumulative")
+
+    def __init__(self, outcomes: np.ndarray, weights: np.ndarray):
+        cumulative = np.cumsum(weights, dtype=np.float64)
+        if not len(cumulative) or cumulative[-1] <= 0:
+            raise ValueError("CumulativeTable needs at least one outcome with positive weight.")
+        self.outcomes = outcomes
+        self.cumulative = cumulative
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    def sample(self, rng) -> int:
+        target = rng.random() * self.cumulative[-1]
+        index = min(int(self.cumulative.searchsorted(target, side="right")), len(self.outcomes) - 1)
+        return int(self.outcomes[index])
+
+
+class LRUCache(Generic[T]):
+    """
+    A bounded mapping that evicts the least recently used entries once the
+    total size of its values (len() of each, or 1) exceeds max_size.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self._entries: "OrderedDict[Hashable, T]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Optional[T]]) -> Optional[T]:
+        """
+        Returns the cached value for key, calling build() to create it on a miss.
+        """
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            return entries[key]
+        value = build()
+        weight = self._weight(value)
+        if weight <= self.max_size:
+            entries[key] = value
+            self.size += weight
+            while self.size > self.max_size:
+                _, evicted = entries.popitem(last=False)
+                self.size -= self._weight(evicted)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    @staticmethod
+    def _weight(value) -> int:
+        return len(value) if hasattr(value, "__len__") else 1
+
+
+class BackoffSampler:
+    """
+    Samples next-word IDs from a smoothed BackoffScorer distribution without
+    materializing it over the whole vocabulary.
+
+    Interpolated Kneser-Ney is a mixture: with probability 1 - backoff weight
+    the word comes from the discounted counts of the longest matching
+    context, otherwise from the next lower order, down to a uniform choice.
+    Each step therefore only needs a small alias table per (order, context).
+    Stupid backoff is not a mixture, so its normalized scores are sampled from
+    a cumulative table over the vocabulary instead.
+    """
+
+    def __init__(self, scorer, cache: LRUCache):
+        self.scorer = scorer
+        self.cache = cache
+
+    def sample(self, context_ids: Sequence[int], rng) -> Optional[int]:
+        """
+        Draws the ID of the next word after a context of n-1 token IDs.
+        """
+        scorer = self.scorer
+        if scorer.method != "kneser_ney":
+            table = self.cache.get_or_build(
+                ("stupid_backoff", tuple(context_ids)),
+                lambda: _cumulative_or_none(scorer.distribution(context_ids)),
+            )
+            return None if table is None else table.sample(rng)
+
+        for k in range(scorer.n, 0, -1):
+            table = scorer.orders[k - 1]
+            row = table.find_context_ids(context_ids[len(context_ids) - (k - 1):] if k > 1 else [])
+            if row is None:
+                continue
+            # Probability mass left to this order after discounting
+            if rng.random() < 1.0 - scorer.backoff_weights[k - 1][row]:
+                discounted = self.cache.get_or_build((k, row), lambda: self._discounted_table(k, row))
+                if discounted is not None:
+                    return discounted.sample(rng)
+
+        # The uniform base distribution, restricted to words that can follow
+        num_words = len(scorer.vocabulary)
+        if num_words == 0 or (num_words == 1 and scorer._start_id is not None):
+            return None
+        while True:
+            word_id = min(int(rng.random() * num_words), num_words - 1)
+            if word_id != scorer._start_id:
+                return word_id
+
+    def _discounted_table(self, k: int, row: int) -> Optional[AliasTable]:
+        """
+        Builds the alias table of the discounted counts after a context of order k.
+        """
+        scorer = self.scorer
+        table = scorer.orders[k - 1]
+        start, end = table.offsets[row], table.offsets[row + 1]
+        weights = np.maximum(table.counts[start:end] - scorer.discounts[k - 1], 0.0)
+        if not weights.any():
+            return None
+        return AliasTable(table.next_ids[start:end].tolist(), weights.tolist())
+
+
+def _cumulative_or_none(scores: np.ndarray) -> Optional[CumulativeTable]:
+    word_ids = scores.nonzero()[0]
+    return CumulativeTable(word_ids, scores[word_ids]) if len(word_ids) else None
@@ -0,0 +1,209 @@
+import math
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from src.models.ngram_storage import ArrayNgramStore, reduce_rows
+
+SMOOTHING_METHODS = ("kneser_ney", "stupid_backoff")
+
+
+class BackoffScorer:
+    """
+    Scores words with interpolated Kneser-Ney or stupid backoff over every
+    order from 1 to n.
+
+    All lower-order tables are derived once from the highest-order counts and
+    stored like ArrayNgramStore, together with the per-context normalizers
+    (total count and backoff weight), so a query is a handful of binary
+    searches and multiplications. get_state() returns these derived arrays so
+    they can be saved with the counts and mapped back instead of recomputed.
+    """
+
+    def __init__(self, store: ArrayNgramStore, method: str = "kneser_ney",
+                 discount: Optional[float] = None, alpha: float = 0.4,
+                 state: Optional[Dict[str, np.ndarray]] = None):
+        """
+        Args:
+            store: The counts of the highest order.
+            method: "kneser_ney" or "stupid_backoff".
+            discount: A fixed absolute discount for Kneser-Ney. By default each
+                order uses n1 / (n1 + 2 * n2), estimated from its count-of-counts.
+            alpha: The backoff factor of stupid backoff.
+            state: Arrays from get_state() of a scorer built on the same store
+                with the same method. They are used as they are, so no table
+                is derived.
+        """
+        if method not in SMOOTHING_METHODS:
+            raise ValueError(f"Unknown smoothing '{method}'. Choose from: {list(SMOOTHING_METHODS)}")
+        self.method = method
+        self.alpha = alpha
+        self.n = store.n
+        self.vocabulary = store.vocabulary
+        # Words that can be predicted: everything but <s>, plus one slot for
+        # unknown words
+        self._start_id = self.vocabulary.get("<s>")
+        self._num_outcomes = len(self.vocabulary) - (self._start_id is not None) + 1
+
+        # orders[k - 1] holds the table of order k
+        self.orders: List[ArrayNgramStore] = [None] * self.n
+        self.discounts = np.zeros(self.n)
+        self.inverse_totals: List[np.ndarray] = [None] * self.n
+        self.backoff_weights: List[np.ndarray] = [None] * self.n
+        if state is not None:
+            self._set_state(store, state)
+            return
+
+        rows, counts = store.ngram_table()
+
+        for k in range(self.n, 0, -1):
+            if k < self.n:
+                if method == "kneser_ney":
+                    # Continuation counts: how many distinct words precede each k-gram
+                    rows, counts = reduce_rows(rows[:, 1:], np.ones(len(rows), dtype=np.int64))
+                else:
+                    rows, counts = reduce_rows(rows[:, 1:], counts)
+            table = ArrayNgramStore(k)
+            table.vocabulary = self.vocabulary
+            table._build_index(rows, counts)
+            self.orders[k - 1] = table
+
+            if discount is not None:
+                self.discounts[k - 1] = discount
+            else:
+                n1 = np.count_nonzero(counts == 1)
+                n2 = np.count_nonzero(counts == 2)
+                self.discounts[k - 1] = n1 / (n1 + 2 * n2) if n1 + 2 * n2 else 0.75
+            totals = table.totals.astype(np.float64)
+            types = np.diff(table.offsets).astype(np.float64)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self.inverse_totals[k - 1] = np.where(totals > 0, 1.0 / totals, 0.0)
+            self.backoff_weights[k - 1] = self.discounts[k - 1] * types * self.inverse_totals[k - 1]
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the derived tables and normalizers as named arrays.
+
+        The highest-order table is the store itself and is not included.
+        """
+        state = {"discounts": self.discounts}
+        for k in range(1, self.n + 1):
+            if k < self.n:
+                table = self.orders[k - 1]
+                state[f"order{k}_context_columns"] = table.contexts.T
+                state[f"order{k}_offsets"] = table.offsets
+                state[f"order{k}_next_ids"] = table.next_ids
+                state[f"order{k}_counts"] = table.counts
+                state[f"order{k}_totals"] = table.totals
+            state[f"order{k}_inverse_totals"] = self.inverse_totals[k - 1]
+            state[f"order{k}_backoff_weights"] = self.backoff_weights[k - 1]
+        return state
+
+    def _set_state(self, store: ArrayNgramStore, state: Dict[str, np.ndarray]) -> None:
+        """
+        Takes the tables and normalizers from arrays returned by get_state().
+        """
+        self.discounts = state["discounts"]
+        for k in range(1, self.n + 1):
+            if k < self.n:
+                table = ArrayNgramStore(k)
+                table.vocabulary = self.vocabulary
+                table.contexts = state[f"order{k}_context_columns"].T
+                table.offsets = state[f"order{k}_offsets"]
+                table.next_ids = state[f"order{k}_next_ids"]
+                table.counts = state[f"order{k}_counts"]
+                table.totals = state[f"order{k}_totals"]
+            else:
+                table = store
+            self.orders[k - 1] = table
+            self.inverse_totals[k - 1] = state[f"order{k}_inverse_totals"]
+            self.backoff_weights[k - 1] = state[f"order{k}_backoff_weights"]
+
+    def _lookup(self, k: int, context_ids: Sequence[int], word_id: Optional[int]):
+        """
+        Finds a context of order k and the count of word_id after it.
+
+        Returns:
+            (context row, count), with context row None if the context is unseen.
+        """
+        table = self.orders[k - 1]
+        row = table.find_context_ids(context_ids[len(context_ids) - (k - 1):] if k > 1 else [])
+        if row is None or word_id is None:
+            return row, 0
+        start, end = table.offsets[row], table.offsets[row + 1]
+        position = start + int(table.next_ids[start:end].searchsorted(np.int32(word_id)))
+        if position < end and table.next_ids[position] == word_id:
+            return row, int(table.counts[position])
+        return row, 0
+
+    def probability(self, word_id: Optional[int], context_ids: Sequence[int]) -> float:
+        """
+        Returns the smoothed score of a word after a context of n-1 token IDs.
+
+        For Kneser-Ney this is a probability; stupid backoff scores are not
+        normalized. word_id None stands for an unknown word.
+        """
+        if self.method == "kneser_ney":
+            score = 1.0 / self._num_outcomes
+            for k in range(1, self.n + 1):
+                row, count = self._lookup(k, context_ids, word_id)
+                if row is None:
+                    continue
+                discounted = max(count - self.discounts[k - 1], 0.0) * self.inverse_totals[k - 1][row]
+                score = discounted + self.backoff_weights[k - 1][row] * score
+            return score
+
+        for k in range(self.n, 1, -1):
+            row, count = self._lookup(k, context_ids, word_id)
+            if count:
+                return self.alpha ** (self.n - k) * count * self.inverse_totals[k - 1][row]
+        # Add-one estimate at the unigram level so unknown words score above zero
+        _, count = self._lookup(1, context_ids, word_id)
+        total = self.orders[0].totals[0] if len(self.orders[0].totals) else 0
+        return self.alpha ** (self.n - 1) * (count + 1) / (total + self._num_outcomes)
+
+    def distribution(self, context_ids: Sequence[int]) -> np.ndarray:
+        """
+        Returns the smoothed scores of every vocabulary ID after a context,
+        computed for all words at once.
+        """
+        scores = np.zeros(len(self.vocabulary))
+        if self.method == "kneser_ney":
+            scores += 1.0 / self._num_outcomes
+            for k in range(1, self.n + 1):
+                row, _ = self._lookup(k, context_ids, None)
+                if row is None:
+                    continue
+                table = self.orders[k - 1]
+                start, end = table.offsets[row], table.offsets[row + 1]
+                scores *= self.backoff_weights[k - 1][row]
+                discounted = np.maximum(table.counts[start:end] - self.discounts[k - 1], 0.0)
+                scores[table.next_ids[start:end]] += discounted * self.inverse_totals[k - 1][row]
+        else:
+            unigrams = self.orders[0]
+            total = unigrams.totals[0] if len(unigrams.totals) else 0
+            scores += 1.0
+            if len(unigrams.totals):
+                scores[unigrams.next_ids] += unigrams.counts
+            scores *= self.alpha ** (self.n - 1) / (total + self._num_outcomes)
+            for k in range(2, self.n + 1):
+                row, _ = self._lookup(k, context_ids, None)
+                if row is None:
+                    continue
+                table = self.orders[k - 1]
+                start, end = table.offsets[row], table.offsets[row + 1]
+                scores[table.next_ids[start:end]] = (self.alpha ** (self.n - k) * table.counts[start:end]
+                                                     * self.inverse_totals[k - 1][row])
+        if self._start_id is not None:
+            scores[self._start_id] = 0.0
+        return scores
+
+    def log_score(self, tokens: List[str]) -> float:
+        """
+        Sums the natural log scores of every token of a padded sentence
+        after its first n-1 tokens.
+        """
+        ids = [self.vocabulary.get(token) for token in tokens]
+        context_ids = [-1 if token_id is None else token_id for token_id in ids]
+        total = 0.0
+        for i in range(self.n - 1, len(ids)):
+            total += math.log(self.probability(ids[i], context_ids[i - self.n + 1:i]))
+        return total
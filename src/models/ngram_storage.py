@@ -0,0 +1,533 @@
+import heapq
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.core.interfaces import Tokenizer
+from src.core.parallel import effective_n_jobs
+from src.core.vocabulary import MappedVocabulary, Vocabulary, pack_tokens
+
+# Identifies files written by ArrayNgramStore.save
+FILE_MAGIC = b"NGRAMLM\0"
+FILE_VERSION = 1
+# Each array in the file starts at a multiple of this many bytes
+FILE_ALIGNMENT = 64
+# Prefixes the names of the extra arrays passed to ArrayNgramStore.save
+EXTRA_PREFIX = "extra/"
+
+# (next words, their counts, total count of the context)
+Continuations = Tuple[List[str], List[int], int]
+# A partial count table: its own vocabulary, sorted n-gram rows of IDs from
+# that vocabulary, and their counts
+CountTable = Tuple[Vocabulary, np.ndarray, np.ndarray]
+
+# The tokenizer and order of the current counting worker process, set once by
+# the pool initializer
+_worker_tokenizer = None
+_worker_n = None
+
+
+class NgramStore(ABC):
+    """
+    Abstract base class for the storage engine behind NgramLanguageModel.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+
+    @abstractmethod
+    def add_sentences(self, sentences: Iterable[List[str]]) -> None:
+        """
+        Counts every n-gram of the given sentences.
+
+        Args:
+            sentences: Token lists, already padded with <s> and </s>.
+        """
+        pass
+
+    @abstractmethod
+    def continuations(self, context: Tuple[str, ...]) -> Optional[Continuations]:
+        """
+        Looks up the words observed after a context of n-1 tokens.
+
+        Returns:
+            The next words with their counts and the context's total count,
+            or None if the context was never seen.
+        """
+        pass
+
+    @abstractmethod
+    def top_continuations(self, context: Tuple[str, ...], k: int) -> Optional[Continuations]:
+        """
+        Like continuations(), but returns only the k most frequent next words,
+        most frequent first.
+        """
+        pass
+
+    @abstractmethod
+    def __contains__(self, token: str) -> bool:
+        """Whether the token occurred in the training data."""
+        pass
+
+
+class DictNgramStore(NgramStore):
+    """
+    Keeps counts in nested dictionaries keyed by tuples of strings. Simple and
+    fast to update, but costs hundreds of bytes per n-gram.
+    """
+
+    def __init__(self, n: int):
+        super().__init__(n)
+        self._ngram_counts = defaultdict(lambda: defaultdict(int))
+        self._context_counts = defaultdict(int)
+        self._vocabulary = set()
+
+    def add_sentences(self, sentences: Iterable[List[str]]) -> None:
+        n = self.n
+        for tokens in sentences:
+            self._vocabulary.update(tokens)
+
+            for i in range(len(tokens) - n + 1):
+                ngram = tuple(tokens[i : i + n])
+                context = ngram[:-1]
+                next_word = ngram[-1]
+
+                self._ngram_counts[context][next_word] += 1
+                self._context_counts[context] += 1
+
+    def continuations(self, context: Tuple[str, ...]) -> Optional[Continuations]:
+        if context not in self._context_counts:
+            return None
+        next_counts = self._ngram_counts[context]
+        return list(next_counts), list(next_counts.values()), self._context_counts[context]
+
+    def top_continuations(self, context: Tuple[str, ...], k: int) -> Optional[Continuations]:
+        if context not in self._context_counts:
+            return None
+        # A heap of size k instead of sorting every continuation
+        top = heapq.nlargest(k, self._ngram_counts[context].items(), key=itemgetter(1))
+        return [word for word, _ in top], [count for _, count in top], self._context_counts[context]
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._vocabulary
+
+    def to_array_store(self) -> "ArrayNgramStore":
+        """
+        Copies the counts into an ArrayNgramStore.
+        """
+        store = ArrayNgramStore(self.n)
+        for token in self._vocabulary:
+            store.vocabulary.add(token)
+        encode = store.vocabulary.encode
+        rows = [list(encode(context)) + [store.vocabulary[next_word]]
+                for context, next_counts in self._ngram_counts.items()
+                for next_word in next_counts]
+        counts = [count for next_counts in self._ngram_counts.values() for count in next_counts.values()]
+        store._build_index(*reduce_rows(np.array(rows, dtype=np.int32).reshape(-1, self.n),
+                                        np.array(counts, dtype=np.int64)))
+        return store
+
+
+class ArrayNgramStore(NgramStore):
+    """
+    Keeps counts in sorted, packed NumPy arrays over integer token IDs.
+
+    The distinct contexts are rows of an (n_contexts, n-1) int32 array in
+    lexicographic order, laid out column by column so the binary search on
+    each context position runs over contiguous memory. offsets[i]:offsets[i + 1] is the slice of next_ids and
+    counts holding the continuations of context i, so a lookup is a binary
+    search per context position followed by two slices.
+    """
+
+    # Tokens buffered before their n-grams are counted and merged in
+    CHUNK_TOKENS = 1 << 20
+
+    def __init__(self, n: int):
+        super().__init__(n)
+        self.vocabulary = Vocabulary()
+        self.contexts = np.empty((0, n - 1), dtype=np.int32, order='F')
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.next_ids = np.empty(0, dtype=np.int32)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.totals = np.empty(0, dtype=np.int64)
+        self._ranking: Optional[np.ndarray] = None
+        # Extra metadata read from the file header
+        self.metadata: Dict = {}
+        # Arrays saved alongside the counts by other components (such as a
+        # smoothing scorer's derived tables), as mapped by load()
+        self.extra_arrays: Dict[str, np.ndarray] = {}
+
+    def add_sentences(self, sentences: Iterable[List[str]]) -> None:
+        self._ensure_growable()
+        partials = [self.ngram_table()]
+        ids = array('i')
+        lengths = array('q')
+        for tokens in sentences:
+            encoded = self.vocabulary.add_document(tokens)
+            ids.extend(encoded)
+            lengths.append(len(encoded))
+            if len(ids) >= self.CHUNK_TOKENS:
+                partials.append(count_ngrams(ids, lengths, self.n))
+                ids = array('i')
+                lengths = array('q')
+        if ids:
+            partials.append(count_ngrams(ids, lengths, self.n))
+
+        rows, counts = merge_counts(partials)
+        self._build_index(rows, counts)
+
+    def add_count_tables(self, tables: Iterable[CountTable]) -> None:
+        """
+        Merges partial count tables, such as those produced by
+        count_ngrams_parallel, into the store.
+
+        Each table's IDs are remapped to this store's vocabulary; the remapped
+        row arrays are then merged by sorting. Tables are merged pairwise
+        whenever the newest one has grown as large as the one before it, so
+        every row takes part in O(log n_tables) merges.
+        """
+        self._ensure_growable()
+        partials = [self.ngram_table()]
+        for vocabulary, rows, counts in tables:
+            mapping = self.vocabulary.update(vocabulary)
+            partials.append((mapping[rows], counts))
+            while len(partials) > 1 and len(partials[-1][0]) >= len(partials[-2][0]):
+                partials[-2:] = [merge_counts(partials[-2:])]
+
+        rows, counts = merge_counts(partials)
+        self._build_index(rows, counts)
+
+    def continuations(self, context: Tuple[str, ...]) -> Optional[Continuations]:
+        context_index = self.find_context(context)
+        if context_index is None:
+            return None
+        start, end = self.offsets[context_index], self.offsets[context_index + 1]
+        words = self.vocabulary.decode(self.next_ids[start:end].tolist())
+        return words, self.counts[start:end].tolist(), int(self.totals[context_index])
+
+    def top_continuations(self, context: Tuple[str, ...], k: int) -> Optional[Continuations]:
+        context_index = self.find_context(context)
+        if context_index is None:
+            return None
+        start, end = self.offsets[context_index], self.offsets[context_index + 1]
+        top = self.ranking()[start:min(start + k, end)]
+        words = self.vocabulary.decode(self.next_ids[top].tolist())
+        return words, self.counts[top].tolist(), int(self.totals[context_index])
+
+    def ranking(self) -> np.ndarray:
+        """
+        Returns positions into next_ids and counts that list each context's
+        continuations by descending count (ties in ID order), so the top k of
+        any context are the first k entries of its offsets slice.
+
+        Built with one sort over all n-grams on first use after the counts
+        change; save() writes it to the file and load() maps it back.
+        """
+        if self._ranking is None:
+            context_of = np.repeat(np.arange(len(self.totals)), np.diff(self.offsets))
+            self._ranking = np.lexsort((-self.counts, context_of)).astype(np.int64)
+        return self._ranking
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.vocabulary
+
+    def find_context(self, context: Tuple[str, ...]) -> Optional[int]:
+        """
+        Returns the row of the context in the contexts array, or None.
+        """
+        if len(context) != self.n - 1:
+            return None
+        context_ids = []
+        for token in context:
+            token_id = self.vocabulary.get(token)
+            if token_id is None:
+                return None
+            context_ids.append(token_id)
+        return self.find_context_ids(context_ids)
+
+    def find_context_ids(self, context_ids: List[int]) -> Optional[int]:
+        """
+        Returns the row of a context given as n-1 token IDs, or None.
+        """
+        lo, hi = 0, len(self.contexts)
+        for position, token_id in enumerate(context_ids):
+            # Rows lo:hi share the context's prefix, so this column is sorted
+            column = self.contexts[lo:hi, position]
+            # A key of the column's own dtype keeps searchsorted from casting
+            # (and copying) the whole column
+            key = np.int32(token_id)
+            lo, hi = (lo + int(column.searchsorted(key, side='left')),
+                      lo + int(column.searchsorted(key, side='right')))
+            if lo == hi:
+                return None
+        return lo if lo < hi else None
+
+    def save(self, path: str, metadata: Optional[Dict] = None,
+             extra_arrays: Optional[Dict[str, np.ndarray]] = None) -> None:
+        """
+        Writes the vocabulary and count arrays to a single binary file.
+
+        The file starts with a magic string, the length of a JSON header and
+        the header itself, which records n, any extra JSON-serializable
+        metadata, and the offset, dtype and shape of every array. The arrays
+        follow in native byte order, each aligned to FILE_ALIGNMENT bytes so
+        they can be mapped in place by load(). extra_arrays are written the
+        same way and come back as the loaded store's extra_arrays.
+        """
+        blob, token_offsets, sorted_ids = pack_tokens(list(self.vocabulary))
+        arrays = {
+            "token_bytes": blob,
+            "token_offsets": token_offsets,
+            "token_sorted_ids": sorted_ids,
+            # Stored transposed so the columns stay contiguous when mapped
+            "context_columns": self.contexts.T,
+            "offsets": self.offsets,
+            "next_ids": self.next_ids,
+            "counts": self.counts,
+            "totals": self.totals,
+            # Saved so loaded models answer top-k queries without sorting first
+            "ranking": self.ranking(),
+        }
+        for name, values in (extra_arrays or {}).items():
+            arrays[EXTRA_PREFIX + name] = values
+        write_array_file(path, {**(metadata or {}), "n": self.n}, arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "ArrayNgramStore":
+        """
+        Opens a file written by save() with numpy.memmap.
+
+        Nothing is copied: the arrays are read-only views of the mapping, so
+        loading takes constant time and processes opening the same file share
+        its pages through the OS page cache.
+        """
+        header, arrays = read_array_file(path)
+        store = cls(header["n"])
+        store.metadata = {key: value for key, value in header.items() if key != "n"}
+        store.vocabulary = MappedVocabulary(
+            arrays["token_bytes"], arrays["token_offsets"], arrays["token_sorted_ids"]
+        )
+        store.contexts = arrays["context_columns"].T
+        store.offsets = arrays["offsets"]
+        store.next_ids = arrays["next_ids"]
+        store.counts = arrays["counts"]
+        store.totals = arrays["totals"]
+        store._ranking = arrays.get("ranking")
+        store.extra_arrays = {name[len(EXTRA_PREFIX):]: values for name, values in arrays.items()
+                              if name.startswith(EXTRA_PREFIX)}
+        return store
+
+    def _ensure_growable(self) -> None:
+        if isinstance(self.vocabulary, MappedVocabulary):
+            # A loaded, read-only vocabulary must become growable again
+            self.vocabulary = self.vocabulary.to_vocabulary()
+
+    def ngram_table(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Expands the index back into sorted (n_ngrams, n) rows and their counts.
+        """
+        context_rows = np.repeat(self.contexts, np.diff(self.offsets), axis=0)
+        return np.column_stack([context_rows, self.next_ids]).astype(np.int32), self.counts
+
+    def _build_index(self, rows: np.ndarray, counts: np.ndarray) -> None:
+        """
+        Splits sorted, distinct n-gram rows into the context index arrays.
+        """
+        if len(rows):
+            changed = np.any(rows[1:, :-1] != rows[:-1, :-1], axis=1)
+            starts = np.flatnonzero(np.concatenate(([True], changed)))
+        else:
+            starts = np.empty(0, dtype=np.int64)
+        self.contexts = np.asfortranarray(rows[starts, :-1])
+        self.offsets = np.append(starts, len(rows)).astype(np.int64)
+        self.next_ids = np.ascontiguousarray(rows[:, -1])
+        self.counts = counts.astype(np.int64)
+        self.totals = (np.add.reduceat(self.counts, starts) if len(starts)
+                       else np.empty(0, dtype=np.int64))
+        self._ranking = None
+        self.extra_arrays = {}
+
+
+def pad_tokens(tokens: List[str], n: int) -> List[str]:
+    """
+    Adds n-1 start tokens and one end token around a sentence.
+    """
+    return ["<s>"] * (n - 1) + tokens + ["</s>"]
+
+
+def _init_counting_worker(tokenizer: Tokenizer, n: int) -> None:
+    global _worker_tokenizer, _worker_n
+    _worker_tokenizer = tokenizer
+    _worker_n = n
+
+
+def _count_shard(documents: List[str]) -> Tuple[CountTable, int]:
+    vocabulary = Vocabulary()
+    ids = array('i')
+    lengths = array('q')
+    for tokens in _worker_tokenizer.tokenize_iter(documents):
+        encoded = vocabulary.add_document(pad_tokens(tokens, _worker_n))
+        ids.extend(encoded)
+        lengths.append(len(encoded))
+    rows, counts = count_ngrams(ids, lengths, _worker_n)
+    return (vocabulary, rows, counts), len(ids)
+
+
+def count_ngrams_parallel(tokenizer: Tokenizer, corpus: Iterable[str], n: int, n_jobs: int,
+                          shard_size: int = 10000, verbose: bool = False) -> Iterator[CountTable]:
+    """
+    Tokenizes and counts the n-grams of a corpus in worker processes.
+
+    The corpus is read lazily in shards of shard_size documents, with at most
+    two shards per worker in flight. Each worker encodes its shard with a
+    vocabulary of its own and returns the sorted, packed count table, which
+    ArrayNgramStore.add_count_tables merges.
+
+    Args:
+        tokenizer: The Tokenizer to split documents with; sent once per worker.
+        corpus: An iterable of documents.
+        n: The n-gram order.
+        n_jobs: The number of worker processes (see effective_n_jobs).
+        shard_size: Documents per shard.
+        verbose: If True, print the number of shards, tokens and the
+            throughput after each shard.
+
+    Yields:
+        One CountTable per shard, in corpus order.
+    """
+    n_workers = effective_n_jobs(n_jobs)
+    documents = iter(corpus)
+    pending = deque()
+    shards_done = 0
+    tokens_done = 0
+    start_time = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_counting_worker,
+                             initargs=(tokenizer, n)) as executor:
+        while True:
+            while len(pending) < 2 * n_workers:
+                shard = list(islice(documents, shard_size))
+                if not shard:
+                    break
+                pending.append(executor.submit(_count_shard, shard))
+            if not pending:
+                break
+
+            table, num_tokens = pending.popleft().result()
+            shards_done += 1
+            tokens_done += num_tokens
+            if verbose:
+                elapsed = time.perf_counter() - start_time
+                print(f"Counted shard {shards_done}: {tokens_done} tokens in {elapsed:.1f}s "
+                      f"({tokens_done / max(elapsed, 1e-9):,.0f} tokens/s)")
+            yield table
+
+
+def count_ngrams(ids: array, lengths: array, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Counts the n-grams of concatenated, encoded sentences.
+
+    Args:
+        ids: Token IDs of all sentences back to back.
+        lengths: The number of tokens in each sentence.
+        n: The n-gram order.
+
+    Returns:
+        Lexicographically sorted, distinct (n_ngrams, n) int32 rows and their counts.
+    """
+    flat = np.frombuffer(ids, dtype=np.int32)
+    lengths = np.frombuffer(lengths, dtype=np.int64)
+    if len(flat) < n:
+        return np.empty((0, n), dtype=np.int32), np.empty(0, dtype=np.int64)
+
+    # A window is valid only if it ends inside the sentence it starts in
+    sentence_ends = np.repeat(np.cumsum(lengths), lengths)[:len(flat) - n + 1]
+    starts = np.arange(len(flat) - n + 1)
+    windows = sliding_window_view(flat, n)[starts + n <= sentence_ends]
+    return reduce_rows(windows, np.ones(len(windows), dtype=np.int64))
+
+
+def merge_counts(partials: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merges several (rows, counts) tables, summing the counts of equal rows.
+    """
+    rows = np.concatenate([rows for rows, _ in partials])
+    counts = np.concatenate([counts for _, counts in partials])
+    return reduce_rows(rows, counts)
+
+
+def reduce_rows(rows: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorts rows lexicographically and sums the counts of duplicate rows.
+    """
+    if not len(rows):
+        return rows.astype(np.int32).reshape(0, rows.shape[1]), counts.astype(np.int64)
+    order = np.lexsort(rows.T[::-1])
+    rows = rows[order]
+    counts = counts[order]
+    changed = np.any(rows[1:] != rows[:-1], axis=1)
+    starts = np.flatnonzero(np.concatenate(([True], changed)))
+    return np.ascontiguousarray(rows[starts], dtype=np.int32), np.add.reduceat(counts, starts)
+
+
+def write_array_file(path: str, metadata: Dict, arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Writes named arrays and JSON metadata to one file readable by read_array_file().
+    """
+    sections = {}
+    position = 0
+    for name, values in arrays.items():
+        sections[name] = {"offset": position, "dtype": values.dtype.str, "shape": list(values.shape)}
+        position += -(-values.nbytes // FILE_ALIGNMENT) * FILE_ALIGNMENT
+
+    header = json.dumps({"version": FILE_VERSION, "metadata": metadata, "sections": sections}).encode("utf-8")
+    prefix_length = len(FILE_MAGIC) + 8 + len(header)
+    data_start = -(-prefix_length // FILE_ALIGNMENT) * FILE_ALIGNMENT
+
+    with open(path, "wb") as f:
+        f.write(FILE_MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        f.write(b"\0" * (data_start - prefix_length))
+        for name, values in arrays.items():
+            f.seek(data_start + sections[name]["offset"])
+            f.write(np.ascontiguousarray(values).tobytes())
+        f.truncate(data_start + position)
+
+
+def read_array_file(path: str) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """
+    Memory-maps a file written by write_array_file().
+
+    Returns:
+        The metadata and a dict of read-only arrays backed by the mapping.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"N-gram model file not found at: {path}")
+
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+    if mapped[:len(FILE_MAGIC)].tobytes() != FILE_MAGIC:
+        raise ValueError(f"{path} is not an N-gram model file.")
+    header_length = int(mapped[len(FILE_MAGIC):len(FILE_MAGIC) + 8].view(np.uint64)[0])
+    header_start = len(FILE_MAGIC) + 8
+    header = json.loads(mapped[header_start:header_start + header_length].tobytes())
+    if header["version"] != FILE_VERSION:
+        raise ValueError(f"Unsupported N-gram model file version: {header['version']}")
+
+    data_start = -(-(header_start + header_length) // FILE_ALIGNMENT) * FILE_ALIGNMENT
+    arrays = {}
+    for name, section in header["sections"].items():
+        dtype = np.dtype(section["dtype"])
+        shape = tuple(section["shape"])
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(mapped, dtype=dtype, count=count,
+                                     offset=data_start + section["offset"]).reshape(shape)
+    return header["metadata"], arrays
@@ -1,33 +1,150 @@
-from typing import List, Dict
-from sklearn.linear_model import LogisticRegression
+from typing import Any, Iterable, List, Dict, Optional, Tuple
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 from src.core.interfaces import Vectorizer
 
+CLASSIFIERS = ("logistic_regression", "sgd")
+
 class TextClassifier:
     """
     A text classifier that uses a Vectorizer to transform text into features
-    and a LogisticRegression model for classification.
+    and a linear model for classification.
+
+    With a vectorizer created with sparse=True, features stay in a
+    scipy.sparse.csr_matrix from the vectorizer to the model.
     """
 
-    def __init__(self, vectorizer: Vectorizer):
+    def __init__(self, vectorizer: Vectorizer, classifier: str = "logistic_regression",
+                 random_state: int = 42):
+        """
+        Args:
+            vectorizer: The Vectorizer that turns texts into features.
+            classifier: "logistic_regression" (liblinear, trained in one batch)
+                or "sgd", a logistic-loss SGDClassifier that can also be trained
+                incrementally with partial_fit() and warm-started by fit().
+            random_state: Seed for the model's solver.
+        """
+        if classifier not in CLASSIFIERS:
+            raise ValueError(f"Unknown classifier '{classifier}'. Choose from: {list(CLASSIFIERS)}")
         self._vectorizer = vectorizer
+        self._classifier_type = classifier
+        self._random_state = random_state
         self._model = None
 
-    def fit(self, texts: List[str], labels: List[int]) -> None:
+    def _new_model(self):
+        if self._classifier_type == "sgd":
+            return SGDClassifier(loss="log_loss", random_state=self._random_state)
+        return LogisticRegression(solver='liblinear', random_state=self._random_state)
+
+    def fit(self, texts: List[str], labels: List[int], warm_start: bool = False,
+            warm_start_epochs: int = 1) -> None:
         """
         Trains the classifier using the provided texts and labels.
 
         Args:
             texts: A list of text documents.
             labels: A list of corresponding integer labels.
+            warm_start: If True and the classifier is already trained, keep the
+                fitted vectorizer and continue training the current weights on
+                the new data with incremental SGD updates instead of refitting,
+                e.g. to retrain on newly labeled data. The labels must be among
+                the classes seen in the first training, but a batch may hold
+                only some of them. Requires classifier="sgd".
+            warm_start_epochs: Passes over the new data when warm-starting.
         """
+        if warm_start and self._classifier_type != "sgd":
+            raise ValueError("warm_start requires classifier='sgd'.")
+        if warm_start and self._model is not None:
+            unknown = np.setdiff1d(labels, self._model.classes_)
+            if unknown.size:
+                raise ValueError(f"Labels {unknown.tolist()} were not seen in training; "
+                                 "warm_start cannot add classes. Refit without warm_start.")
+            # The feature space must not change under the existing weights
+            X = self._vectorizer.transform(texts)
+            for _ in range(warm_start_epochs):
+                self._model.partial_fit(X, labels, classes=self._model.classes_)
+            return
+
         # Transform texts into numerical features
         X = self._vectorizer.fit_transform(texts)
         
-        # Initialize and train the Logistic Regression model
-        self._model = LogisticRegression(solver='liblinear', random_state=42)
+        # Initialize and train the model
+        self._model = self._new_model()
         self._model.fit(X, labels)
 
+    def partial_fit(self, texts: List[str], labels: List[int], classes: Optional[List[int]] = None) -> None:
+        """
+        Updates the classifier with one mini-batch of labeled texts.
+
+        Only the model is updated: the vectorizer must already be fitted, or
+        be stateless (a HashingVectorizer without IDF), so that every batch
+        maps to the same feature space. Requires classifier="sgd".
+
+        Args:
+            texts: The documents of the batch.
+            labels: Their integer labels.
+            classes: Every label the stream can contain. Needed on the first
+                call only; defaults to the labels seen in that first batch.
+        """
+        if self._classifier_type != "sgd":
+            raise ValueError("partial_fit requires classifier='sgd'.")
+        if self._model is None:
+            self._model = self._new_model()
+            if classes is None:
+                classes = np.unique(labels)
+        X = self._vectorizer.transform(texts)
+        self._model.partial_fit(X, labels, classes=classes)
+
+    def fit_batches(self, batches: Iterable[Tuple[List[str], List[int]]],
+                    classes: Optional[List[int]] = None) -> None:
+        """
+        Trains the classifier on a stream of (texts, labels) mini-batches, one
+        batch in memory at a time, for corpora too large to vectorize at once.
+
+        Call it again with a fresh stream for further epochs. See partial_fit()
+        for the requirements on the vectorizer.
+        """
+        for texts, labels in batches:
+            self.partial_fit(texts, labels, classes=classes)
+
+    def get_params(self) -> Dict[str, Any]:
+        """
+        Returns the constructor arguments, other than the vectorizer, that
+        recreate this classifier.
+        """
+        return {"classifier": self._classifier_type, "random_state": self._random_state}
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the trained model's coefficients as named NumPy arrays.
+        """
+        if self._model is None:
+            raise RuntimeError("Classifier has not been fitted yet. Call fit() first.")
+        arrays = {
+            "coef": self._model.coef_,
+            "intercept": self._model.intercept_,
+            "classes": self._model.classes_,
+        }
+        if self._classifier_type == "sgd":
+            # The step count drives SGD's learning rate when training resumes
+            arrays["t"] = np.array(self._model.t_)
+        return arrays
+
+    def set_state(self, arrays: Dict[str, np.ndarray]) -> None:
+        """
+        Restores a model from arrays returned by get_state(). The arrays are
+        copied, since continued training updates them in place.
+        """
+        model = self._new_model()
+        model.coef_ = np.array(arrays["coef"])
+        model.intercept_ = np.array(arrays["intercept"])
+        model.classes_ = np.array(arrays["classes"])
+        model.n_features_in_ = model.coef_.shape[1]
+        if "t" in arrays:
+            model.t_ = float(arrays["t"])
+        self._model = model
+
     def predict(self, texts: List[str]) -> List[int]:
         """
         Predicts labels for the given texts.
@@ -0,0 +1,172 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import List, Optional, Tuple
+from src.pipelines.text_pipeline import TextPipeline
+
+# Tells the batching task to finish the queued requests and exit
+_STOP = object()
+
+
+class AsyncTextPipeline:
+    """
+    An asyncio front end for TextPipeline that coalesces concurrent process()
+    calls into micro-batches.
+
+    Requests are queued; a single background task takes the first waiting
+    request, collects more until max_batch_size is reached or max_wait_ms has
+    passed since the first one, and runs TextPipeline.process_batch on them in
+    an executor. Each caller's future is resolved with its own prediction, so
+    concurrent callers share one vectorized predict() while no request waits
+    for a batch longer than max_wait_ms plus the batch's own run time.
+
+    Usage:
+        async with AsyncTextPipeline(pipeline, max_batch_size=64) as server:
+            label = await server.process(text)
+    """
+
+    def __init__(self, pipeline: TextPipeline, max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 executor: Optional[Executor] = None):
+        """
+        Args:
+            pipeline: The fitted TextPipeline that serves the predictions.
+            max_batch_size: The most requests passed to one process_batch call.
+            max_wait_ms: How long the first request of a batch may wait for
+                others to join it.
+            executor: Where process_batch runs, so it does not block the event
+                loop; defaults to the loop's default thread pool. Batches run
+                one at a time, so the pipeline (and its cache) is never used
+                from two threads at once.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self._pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Set while close() waits for the worker; process() then rejects requests
+        self._closing = False
+        self.num_batches = 0
+        self.num_requests = 0
+
+    async def __aenter__(self) -> "AsyncTextPipeline":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        """
+        Starts the batching task on the running event loop. process() calls
+        this on first use.
+        """
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Serves every request queued so far, then stops the batching task.
+        Requests made while it runs raise RuntimeError; process() may be
+        called again once it has returned, which starts a new task.
+        """
+        if self._worker is None:
+            return
+        self._closing = True
+        try:
+            await self._queue.put(_STOP)
+            await self._worker
+        finally:
+            self._worker = None
+            self._closing = False
+
+    async def process(self, text: str) -> int:
+        """
+        Predicts the label of one text as part of the next micro-batch.
+        """
+        if self._closing:
+            raise RuntimeError("AsyncTextPipeline is closing; no new requests are accepted.")
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def process_batch(self, texts: List[str]) -> List[int]:
+        """
+        Predicts the labels of several texts, which may be spread over (and
+        share) micro-batches with concurrent requests.
+        """
+        return list(await asyncio.gather(*(self.process(text) for text in texts)))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        stopping = False
+        # A queue.get() still pending when a batch's deadline passed. It is
+        # awaited again rather than cancelled: with wait_for, a get that
+        # completes just as the timeout fires can lose its item, leaving that
+        # caller's future unresolved forever.
+        getter: Optional[asyncio.Task] = None
+        try:
+            while not stopping:
+                if getter is None:
+                    item = await queue.get()
+                else:
+                    item, getter = await getter, None
+                if item is _STOP:
+                    break
+                batch: List[Tuple[str, asyncio.Future]] = [item]
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    # Take what is already queued without waiting
+                    if getter is None and not queue.empty():
+                        item = queue.get_nowait()
+                    else:
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            break
+                        if getter is None:
+                            getter = loop.create_task(queue.get())
+                        done, _ = await asyncio.wait((getter,), timeout=remaining)
+                        if not done:
+                            break
+                        item, getter = getter.result(), None
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                await self._serve(loop, batch)
+        finally:
+            if getter is not None:
+                getter.cancel()
+
+        # Requests that raced with close() are still answered, until none are left
+        while not queue.empty():
+            batch = []
+            while len(batch) < self.max_batch_size and not queue.empty():
+                item = queue.get_nowait()
+                if item is not _STOP:
+                    batch.append(item)
+            await self._serve(loop, batch)
+
+    async def _serve(self, loop: asyncio.AbstractEventLoop, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Callers that gave up no longer need a prediction
+        batch = [(text, future) for text, future in batch if not future.cancelled()]
+        if not batch:
+            return
+        self.num_batches += 1
+        self.num_requests += len(batch)
+        try:
+            predictions = await loop.run_in_executor(
+                self._executor, self._pipeline.process_batch, [text for text, _ in batch]
+            )
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result(prediction)
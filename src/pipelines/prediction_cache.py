@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Collapses runs of whitespace and strips the ends, so texts that only
+    differ in spacing share a cache entry.
+    """
+    return " ".join(text.split())
+
+
+class PredictionCache:
+    """
+    A bounded LRU cache of pipeline predictions with an optional time to live.
+
+    Keys are digests of the normalized text and a pipeline version, so the
+    cache holds fixed-size keys however long the texts are, and one cache can
+    be shared by several pipelines (or model versions) without mixing up
+    their predictions. get(), put() and clear() are thread-safe, so a
+    synchronous caller and an AsyncTextPipeline worker can share one cache.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = None,
+                 normalize: Callable[[str], str] = normalize_whitespace,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_size: The maximum number of predictions kept; the least
+                recently used ones are evicted first.
+            ttl: Seconds after which a prediction expires, or None to keep
+                predictions until they are evicted.
+            normalize: Maps a text to the form its prediction is cached under.
+                It must not change what the tokenizer produces; the default
+                only collapses whitespace.
+            clock: The time source for ttl, in seconds.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._normalize = normalize
+        self._clock = clock
+        # key -> (prediction, expiry time or None)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Guards _entries and the counters, which get() and put() update in several steps
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, text: str, version: str = "") -> bytes:
+        """
+        Returns the cache key of a text for a given pipeline version.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(version.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(self._normalize(text).encode("utf-8"))
+        return digest.digest()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached prediction for a key, or default on a miss.
+        Expired entries count as misses and are dropped.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                prediction, expires_at = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return prediction
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, prediction: Any) -> None:
+        """
+        Stores a prediction, evicting the least recently used one if full.
+        """
+        expires_at = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (prediction, expires_at)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drops every entry, e.g. after retraining the model. The counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the hit and miss counts, the hit rate and the current size.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
@@ -1,6 +1,26 @@
-from typing import List
+import os
+from typing import Dict, List, Optional
+import numpy as np
 from src.core.interfaces import Tokenizer, Vectorizer
+from src.core.manifest import read_manifest, write_manifest
 from src.models.text_classifier import TextClassifier
+from src.pipelines.prediction_cache import PredictionCache
+from src.preprocessing.regex_tokenizer import RegexTokenizer
+from src.preprocessing.simple_tokenizer import SimpleTokenizer
+from src.representations.count_vectorizer import CountVectorizer
+from src.representations.hashing_vectorizer import HashingVectorizer
+from src.representations.tfidf_vectorizer import TfidfVectorizer
+
+# Version of the directory layout written by TextPipeline.save
+PIPELINE_FORMAT_VERSION = 1
+PIPELINE_MANIFEST = "pipeline.json"
+
+# Marks a cache miss, since None could be a cached prediction
+_MISSING = object()
+
+# Components that can be saved, by class name
+TOKENIZERS = {cls.__name__: cls for cls in (RegexTokenizer, SimpleTokenizer)}
+VECTORIZERS = {cls.__name__: cls for cls in (CountVectorizer, TfidfVectorizer, HashingVectorizer)}
 
 class TextPipeline:
     """
@@ -8,10 +28,25 @@ class TextPipeline:
     for end-to-end text processing and classification.
     """
 
-    def __init__(self, tokenizer: Tokenizer, vectorizer: Vectorizer, classifier: TextClassifier):
+    def __init__(self, tokenizer: Tokenizer, vectorizer: Vectorizer, classifier: TextClassifier,
+                 cache: Optional[PredictionCache] = None, version: str = "1"):
+        """
+        Args:
+            tokenizer: The Tokenizer shared with the vectorizer.
+            vectorizer: The fitted Vectorizer.
+            classifier: The fitted TextClassifier.
+            cache: An optional PredictionCache in front of process() and
+                process_batch(). Repeated texts are then answered without
+                tokenizing, vectorizing or predicting again.
+            version: Identifies the fitted model in cache keys. Change it (or
+                clear the cache) after retraining so stale predictions are not
+                served.
+        """
         self._tokenizer = tokenizer
         self._vectorizer = vectorizer
         self._classifier = classifier
+        self.cache = cache
+        self.version = version
 
     def process(self, text: str) -> int:
         """
@@ -23,20 +58,136 @@ class TextPipeline:
         Returns:
             The predicted label (integer).
         """
+        if self.cache is not None:
+            key = self.cache.key(text, self.version)
+            prediction = self.cache.get(key, _MISSING)
+            if prediction is not _MISSING:
+                return prediction
+
         # The classifier's predict method handles vectorization internally
         prediction = self._classifier.predict([text])[0] # Pass raw text, get single prediction
+        if self.cache is not None:
+            self.cache.put(key, prediction)
         return prediction
 
     def process_batch(self, texts: List[str]) -> List[int]:
         """
         Processes a batch of text documents through the pipeline to get predictions.
 
+        With a cache, only the texts that miss it are predicted, in a single
+        call and once per distinct cache key.
+
         Args:
             texts: A list of raw text strings to process.
 
         Returns:
             A list of predicted labels (integers).
         """
-        # The classifier's predict method handles vectorization internally
-        predictions = self._classifier.predict(texts) # Pass raw texts, get list of predictions
+        if self.cache is None:
+            # The classifier's predict method handles vectorization internally
+            predictions = self._classifier.predict(texts) # Pass raw texts, get list of predictions
+            return predictions
+
+        cache = self.cache
+        keys = [cache.key(text, self.version) for text in texts]
+        predictions = [cache.get(key, _MISSING) for key in keys]
+        # The first text of each distinct key that missed
+        pending: Dict[bytes, int] = {}
+        for i, prediction in enumerate(predictions):
+            if prediction is _MISSING and keys[i] not in pending:
+                pending[keys[i]] = i
+        if pending:
+            computed = self._classifier.predict([texts[i] for i in pending.values()])
+            results = dict(zip(pending, computed))
+            for key, prediction in results.items():
+                cache.put(key, prediction)
+            predictions = [results[key] if prediction is _MISSING else prediction
+                           for key, prediction in zip(keys, predictions)]
         return predictions
+
+    def cache_info(self) -> Optional[Dict[str, float]]:
+        """
+        Returns the cache's hit/miss statistics, or None without a cache.
+        """
+        return None if self.cache is None else self.cache.stats()
+
+    def save(self, path: str) -> None:
+        """
+        Saves the fitted pipeline to a directory.
+
+        The directory holds a pipeline.json manifest (format version, component
+        classes and constructor arguments) and one .npy file per array of the
+        vectorizer's and classifier's state, under vectorizer/ and classifier/.
+        The manifest is written last, so an interrupted save is never loadable.
+        The vectorizer is assumed to share the pipeline's tokenizer.
+
+        Args:
+            path: The directory to write; created if needed.
+        """
+        tokenizer_type = type(self._tokenizer).__name__
+        vectorizer_type = type(self._vectorizer).__name__
+        if tokenizer_type not in TOKENIZERS:
+            raise ValueError(f"Cannot save tokenizer '{tokenizer_type}'. Supported: {list(TOKENIZERS)}")
+        if vectorizer_type not in VECTORIZERS:
+            raise ValueError(f"Cannot save vectorizer '{vectorizer_type}'. Supported: {list(VECTORIZERS)}")
+
+        manifest = {
+            "version": self.version,
+            "tokenizer": {"type": tokenizer_type, "params": self._tokenizer.get_params()},
+            "vectorizer": {"type": vectorizer_type, "params": self._vectorizer.get_params(),
+                           "arrays": _save_arrays(os.path.join(path, "vectorizer"),
+                                                  self._vectorizer.get_state())},
+            "classifier": {"params": self._classifier.get_params(),
+                           "arrays": _save_arrays(os.path.join(path, "classifier"),
+                                                  self._classifier.get_state())},
+        }
+        write_manifest(os.path.join(path, PIPELINE_MANIFEST), manifest, PIPELINE_FORMAT_VERSION)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, cache: Optional[PredictionCache] = None) -> "TextPipeline":
+        """
+        Loads a pipeline written by save() without refitting anything.
+
+        Args:
+            path: The directory written by save().
+            mmap: If True, the vectorizer's arrays (its vocabulary and IDF
+                weights) are memory-mapped read-only and used in place, so
+                loading does not read them up front and processes loading the
+                same directory share their pages.
+            cache: An optional PredictionCache for the loaded pipeline, which
+                keeps the version it was saved with.
+
+        Returns:
+            A TextPipeline ready for process() and process_batch().
+        """
+        manifest = read_manifest(os.path.join(path, PIPELINE_MANIFEST), PIPELINE_FORMAT_VERSION)
+
+        mmap_mode = "r" if mmap else None
+        tokenizer = TOKENIZERS[manifest["tokenizer"]["type"]](**manifest["tokenizer"]["params"])
+        vectorizer_spec = manifest["vectorizer"]
+        vectorizer = VECTORIZERS[vectorizer_spec["type"]](tokenizer, **vectorizer_spec["params"])
+        vectorizer.set_state(_load_arrays(os.path.join(path, "vectorizer"),
+                                          vectorizer_spec["arrays"], mmap_mode))
+        classifier_spec = manifest["classifier"]
+        classifier = TextClassifier(vectorizer, **classifier_spec["params"])
+        classifier.set_state(_load_arrays(os.path.join(path, "classifier"),
+                                          classifier_spec["arrays"], mmap_mode))
+        return cls(tokenizer, vectorizer, classifier, cache=cache, version=manifest["version"])
+
+
+def _save_arrays(directory: str, arrays: Dict[str, np.ndarray]) -> List[str]:
+    """
+    Writes each array to directory/<name>.npy and returns the names.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.asarray(values), allow_pickle=False)
+    return list(arrays)
+
+
+def _load_arrays(directory: str, names: List[str], mmap_mode=None) -> Dict[str, np.ndarray]:
+    """
+    Reads the arrays written by _save_arrays().
+    """
+    return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+            for name in names}
@@ -1,5 +1,7 @@
 import re
-from src.core.interfaces import Tokenizer
+from functools import lru_cache
+from typing import Iterable
+from src.core.interfaces import Tokenizer, TokenSpans, find_lowercase_spans
 
 
 class RegexTokenizer(Tokenizer):
@@ -11,12 +13,56 @@ class RegexTokenizer(Tokenizer):
     # or any single character that is not a word character or whitespace ([^\w\s]).
     TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
 
+    def __init__(self, pattern: str | None = None, cache_size: int = 32):
+        """
+        Args:
+            pattern: An optional regex to use instead of TOKEN_PATTERN for this instance.
+            cache_size: How many compiled per-call patterns to keep (least
+                recently used ones are evicted first).
+        """
+        self._pattern = re.compile(pattern) if pattern else self.TOKEN_PATTERN
+        self._cache_size = cache_size
+        # functools.lru_cache is thread-safe, so one instance can serve several threads
+        self._compile = lru_cache(maxsize=cache_size)(re.compile)
+
+    def __getstate__(self) -> dict:
+        # The per-instance cache cannot be pickled; a fresh one is made on unpickling
+        state = self.__dict__.copy()
+        del state["_compile"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._compile = lru_cache(maxsize=self._cache_size)(re.compile)
+
+    def get_params(self) -> dict:
+        pattern = None if self._pattern is self.TOKEN_PATTERN else self._pattern.pattern
+        return {"pattern": pattern, "cache_size": self._cache_size}
+
     def tokenize(self, text: str, pattern: str | None = None) -> list[str]:
         """
         Tokenizes the text using a pre-defined regex pattern.
+
+        A pattern passed here only applies to this call; it does not change
+        the pattern used by other calls or other instances.
+        """
+        compiled = self._compile(pattern) if pattern else self._pattern
+        return compiled.findall(text.lower())
+
+    def tokenize_batch(self, texts: Iterable[str], pattern: str | None = None) -> list[list[str]]:
+        """
+        Tokenizes several texts with a single pattern lookup.
+        """
+        findall = (self._compile(pattern) if pattern else self._pattern).findall
+        return [findall(text.lower()) for text in texts]
+
+    def tokenize_with_offsets(self, text: str, pattern: str | None = None) -> TokenSpans:
+        """
+        Tokenizes the text and records where each token starts and ends.
+
+        Matching runs on the lowercased text, as in tokenize(), so
+        spans.tokens always equals tokenize(text, pattern); the offsets index
+        into the original text.
         """
-        if pattern:
-            self.TOKEN_PATTERN = re.compile(pattern)
-        text = text.lower()
-        tokens = self.TOKEN_PATTERN.findall(text)
-        return tokens
+        compiled = self._compile(pattern) if pattern else self._pattern
+        return find_lowercase_spans(compiled, text)
@@ -1,22 +1,49 @@
 import re
-from src.core.interfaces import Tokenizer
+from typing import Iterable, Iterator
+from src.core.interfaces import Tokenizer, TokenSpans, find_lowercase_spans
 
 class SimpleTokenizer(Tokenizer):
     """
     A simple tokenizer that splits text by whitespace and handles basic punctuation.
     """
 
+    # Each of the punctuation marks . , ! ? is a token on its own; everything
+    # else is split on whitespace. One pass is equivalent to padding the
+    # punctuation with spaces, collapsing whitespace and splitting on ' '.
+    TOKEN_PATTERN = re.compile(r"[.,!?]|[^\s.,!?]+")
+
     def tokenize(self, text: str) -> list[str]:
         """
         Tokenizes the text by converting to lowercase, then splitting by spaces
         and separating punctuation.
         """
-        text = text.lower()
-        # Add space around punctuation to split them easily.
-        # This handles cases like "word," or "world!"
-        text = re.sub(r'([.,!?])', r' \1 ', text)
-        # Replace multiple spaces with a single space
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        tokens = text.split(' ')
-        return tokens
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        # Splitting an empty string on ' ' used to yield [''], keep that result
+        return tokens or ['']
+
+    def tokenize_batch(self, texts: Iterable[str]) -> list[list[str]]:
+        """
+        Tokenizes several texts with a single pattern lookup.
+        """
+        findall = self.TOKEN_PATTERN.findall
+        return [findall(text.lower()) or [''] for text in texts]
+
+    def iter_tokens(self, text: str) -> Iterator[str]:
+        """
+        Yields the tokens of the text one at a time without building a list.
+
+        Unlike tokenize(), nothing is yielded for empty or whitespace-only text.
+        """
+        for match in self.TOKEN_PATTERN.finditer(text.lower()):
+            yield match.group()
+
+    def tokenize_with_offsets(self, text: str) -> TokenSpans:
+        """
+        Tokenizes the text and records where each token starts and ends.
+
+        Matching runs on the lowercased text, as in tokenize(), so
+        spans.tokens equals tokenize(text) except that empty or
+        whitespace-only text gives no tokens; the offsets index into the
+        original text.
+        """
+        return find_lowercase_spans(self.TOKEN_PATTERN, text)
@@ -0,0 +1,295 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from src.core.manifest import read_manifest, write_manifest
+
+# Version of the directory layout written by IVFFlatIndex.save
+INDEX_FORMAT_VERSION = 1
+INDEX_MANIFEST = "index.json"
+
+
+class NearestNeighborIndex(ABC):
+    """
+    Abstract base class for cosine-similarity search over the rows of a
+    vector matrix.
+    """
+
+    @abstractmethod
+    def search(self, queries: np.ndarray, k: int,
+               exclude: Optional[Sequence[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the k rows most similar to each query.
+
+        Args:
+            queries: A (n_queries, dim) array.
+            k: How many neighbors to return per query.
+            exclude: Optionally, one row ID per query to leave out of its
+                results (e.g. the query word itself), or -1 for none.
+
+        Returns:
+            (ids, similarities), both (n_queries, k) and sorted by descending
+            similarity. If fewer than k rows are found, ids are padded with -1
+            and similarities with -inf.
+        """
+        pass
+
+
+class ExactIndex(NearestNeighborIndex):
+    """
+    Brute-force search: every query is compared with every row.
+
+    The rows are not copied (only their norms are computed) and are scored
+    a fixed-size chunk at a time, so the index can sit on top of a
+    memory-mapped or float16 matrix without ever upcasting all of it.
+    Serves as the reference for approximate indexes.
+    """
+
+    def __init__(self, vectors: np.ndarray, query_batch_size: int = 64, chunk_rows: int = 8192):
+        """
+        Args:
+            vectors: The (n_rows, dim) matrix to search.
+            query_batch_size: Queries scored against all rows at a time,
+                which bounds the (batch, n_rows) similarity block.
+            chunk_rows: Rows converted to float32 and scored at a time.
+        """
+        self.vectors = vectors
+        self.query_batch_size = query_batch_size
+        self.chunk_rows = chunk_rows
+        norms = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), chunk_rows):
+            block = np.asarray(vectors[start:start + chunk_rows], dtype=np.float32)
+            norms[start:start + chunk_rows] = np.linalg.norm(block, axis=1)
+        norms[norms == 0] = 1.0
+        self.norms = norms
+
+    def search(self, queries: np.ndarray, k: int,
+               exclude: Optional[Sequence[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        queries = normalize(queries)
+        ids, similarities = _empty_results(len(queries), k)
+        n_rows, chunk_rows = len(self.vectors), self.chunk_rows
+        for start in range(0, len(queries), self.query_batch_size):
+            batch = queries[start:start + self.query_batch_size]
+            block = np.empty((len(batch), n_rows), dtype=np.float32)
+            for row in range(0, n_rows, chunk_rows):
+                rows = np.asarray(self.vectors[row:row + chunk_rows], dtype=np.float32)
+                block[:, row:row + chunk_rows] = batch @ rows.T
+            block /= self.norms
+            for i, row_scores in enumerate(block):
+                query = start + i
+                if exclude is not None and exclude[query] >= 0:
+                    row_scores[exclude[query]] = -np.inf
+                ids[query], similarities[query] = _top_k(np.arange(len(row_scores)), row_scores, k)
+        return ids, similarities
+
+
+class IVFFlatIndex(NearestNeighborIndex):
+    """
+    An inverted-file index over L2-normalized float32 vectors.
+
+    build() clusters the vectors into n_lists cells with spherical k-means
+    and stores them grouped by cell, so each cell is one contiguous block.
+    A query is compared with the cell centroids, then exhaustively with the
+    vectors of its n_probe most similar cells only. Larger n_probe trades
+    speed for recall; n_probe = n_lists is exact search.
+    """
+
+    def __init__(self, n_lists: Optional[int] = None, n_probe: int = 8, train_iterations: int = 10,
+                 random_state: Optional[int] = 42):
+        """
+        Args:
+            n_lists: The number of cells; defaults to about sqrt(n_rows).
+            n_probe: How many cells a query searches by default.
+            train_iterations: k-means iterations when building.
+            random_state: Seed for the k-means sample and initialization.
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_iterations = train_iterations
+        self.random_state = random_state
+        self.centroids: Optional[np.ndarray] = None
+        self.vectors: Optional[np.ndarray] = None    # Normalized rows, grouped by cell
+        self.ids: Optional[np.ndarray] = None        # Original row ID of each stored vector
+        self.offsets: Optional[np.ndarray] = None    # Cell c is vectors[offsets[c]:offsets[c + 1]]
+
+    def build(self, vectors: np.ndarray) -> "IVFFlatIndex":
+        """
+        Clusters and stores the vectors.
+
+        Args:
+            vectors: The (n_rows, dim) matrix to index; row IDs are its row numbers.
+        """
+        vectors = normalize(vectors)
+        n_rows = len(vectors)
+        n_lists = self.n_lists or max(1, int(np.sqrt(n_rows)))
+        n_lists = min(n_lists, n_rows)
+        rng = np.random.default_rng(self.random_state)
+
+        # Train the centroids on a sample of rows
+        sample = vectors[rng.choice(n_rows, min(n_rows, 64 * n_lists), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.train_iterations):
+            assigned = _nearest_centroids(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assigned, sample)
+            # Cells that lost every member keep their previous centroid
+            nonempty = np.bincount(assigned, minlength=n_lists) > 0
+            centroids[nonempty] = normalize(sums[nonempty])
+
+        assigned = _nearest_centroids(vectors, centroids)
+        order = np.argsort(assigned, kind="stable")
+        self.centroids = centroids
+        self.vectors = np.ascontiguousarray(vectors[order])
+        self.ids = order.astype(np.int64)
+        self.offsets = np.searchsorted(assigned[order], np.arange(n_lists + 1)).astype(np.int64)
+        self.n_lists = n_lists
+        return self
+
+    def search(self, queries: np.ndarray, k: int, exclude: Optional[Sequence[int]] = None,
+               n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        See NearestNeighborIndex.search. n_probe overrides the index default.
+        """
+        if self.centroids is None:
+            raise RuntimeError("Index has not been built yet. Call build() first.")
+        queries = normalize(queries)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        ids, similarities = _empty_results(len(queries), k)
+
+        # The cells to probe for every query, from one matrix product
+        cell_scores = queries @ self.centroids.T
+        probes = np.argpartition(-cell_scores, n_probe - 1, axis=1)[:, :n_probe]
+        offsets = self.offsets
+        for query, cells in enumerate(probes):
+            candidates = np.concatenate([np.arange(offsets[c], offsets[c + 1]) for c in cells])
+            scores = self.vectors[candidates] @ queries[query]
+            candidate_ids = self.ids[candidates]
+            if exclude is not None and exclude[query] >= 0:
+                scores[candidate_ids == exclude[query]] = -np.inf
+            ids[query], similarities[query] = _top_k(candidate_ids, scores, k)
+        return ids, similarities
+
+    def save(self, path: str) -> None:
+        """
+        Writes the index to a directory of .npy files and a JSON manifest.
+        """
+        if self.centroids is None:
+            raise RuntimeError("Index has not been built yet. Call build() first.")
+        os.makedirs(path, exist_ok=True)
+        for name in ("centroids", "vectors", "ids", "offsets"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name), allow_pickle=False)
+        manifest = {
+            "type": "ivf_flat",
+            "n_lists": self.n_lists,
+            "n_probe": self.n_probe,
+            "num_rows": len(self.ids),
+            "dim": self.centroids.shape[1],
+        }
+        write_manifest(os.path.join(path, INDEX_MANIFEST), manifest, INDEX_FORMAT_VERSION)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "IVFFlatIndex":
+        """
+        Opens an index written by save(), memory-mapping its arrays by default
+        so processes share them.
+        """
+        manifest = read_manifest(os.path.join(path, INDEX_MANIFEST), INDEX_FORMAT_VERSION)
+        index = cls(n_lists=manifest["n_lists"], n_probe=manifest["n_probe"])
+        mmap_mode = "r" if mmap else None
+        for name in ("centroids", "vectors", "ids", "offsets"):
+            setattr(index, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False))
+        if (manifest.get("num_rows", len(index.ids)), manifest.get("dim", index.vectors.shape[1])) != index.vectors.shape:
+            raise ValueError(f"Index arrays at {path} do not match its manifest.")
+        return index
+
+    def check_vectors(self, vectors: np.ndarray, sample_size: int = 16) -> None:
+        """
+        Raises ValueError unless the index was built from these vectors.
+
+        Compares the shape, then a sample of the stored rows with the
+        normalized rows they were built from, so an index saved from other
+        vectors of the same shape is caught too.
+        """
+        if self.centroids is None:
+            raise RuntimeError("Index has not been built yet. Call build() first.")
+        if len(vectors) != len(self.ids) or vectors.shape[1] != self.centroids.shape[1]:
+            raise ValueError(f"Index was built from {len(self.ids)} vectors of dimension "
+                             f"{self.centroids.shape[1]}, but got {vectors.shape[0]} of dimension {vectors.shape[1]}.")
+        if not len(self.ids):
+            return
+        positions = np.linspace(0, len(self.ids) - 1, min(sample_size, len(self.ids))).astype(np.int64)
+        expected = normalize(vectors[np.asarray(self.ids[positions])])
+        if not np.allclose(self.vectors[positions], expected, atol=1e-3):
+            raise ValueError("Index was built from different vectors.")
+
+
+def benchmark_recall(index: NearestNeighborIndex, exact: NearestNeighborIndex, queries: np.ndarray,
+                     k: int = 10, exclude: Optional[Sequence[int]] = None, **search_kwargs) -> Dict[str, float]:
+    """
+    Compares an approximate index with exact search on the same queries.
+
+    Args:
+        index: The index to evaluate.
+        exact: The reference, usually an ExactIndex over the same vectors.
+        queries: The query vectors.
+        k: Neighbors per query.
+        exclude: Passed to both searches.
+        search_kwargs: Extra arguments for index.search, e.g. n_probe.
+
+    Returns:
+        recall@k (the fraction of the exact top k that the index also
+        returns) and the mean search time per query of both, in milliseconds.
+    """
+    start = time.perf_counter()
+    ids, _ = index.search(queries, k, exclude=exclude, **search_kwargs)
+    index_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    exact_ids, _ = exact.search(queries, k, exclude=exclude)
+    exact_seconds = time.perf_counter() - start
+
+    found = sum(len(np.intersect1d(row, exact_row[exact_row >= 0])) for row, exact_row in zip(ids, exact_ids))
+    total = int(np.count_nonzero(exact_ids >= 0))
+    return {
+        "recall": found / total if total else 1.0,
+        "index_ms_per_query": 1000 * index_seconds / max(len(queries), 1),
+        "exact_ms_per_query": 1000 * exact_seconds / max(len(queries), 1),
+    }
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    Returns the rows as a float32 array with unit L2 norm (zero rows stay zero).
+    """
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    assigned = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        assigned[start:start + chunk_size] = (vectors[start:start + chunk_size] @ centroids.T).argmax(axis=1)
+    return assigned
+
+
+def _empty_results(n_queries: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    return np.full((n_queries, k), -1, dtype=np.int64), np.full((n_queries, k), -np.inf, dtype=np.float32)
+
+
+def _top_k(ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the k best (id, score) pairs, sorted, padded with -1 / -inf.
+    """
+    keep = np.isfinite(scores)
+    ids, scores = ids[keep], scores[keep]
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+        ids, scores = ids[top], scores[top]
+    order = np.argsort(-scores, kind="stable")
+    top_ids, top_scores = _empty_results(1, k)
+    top_ids[0, :len(order)] = ids[order]
+    top_scores[0, :len(order)] = scores[order]
+    return top_ids[0], top_scores[0]
@@ -1,47 +1,169 @@
-from typing import List, Dict
+from array import array
+from typing import Iterable, List, Dict, Mapping, Set, Union
+import numpy as np
+from scipy.sparse import csr_matrix
 from src.core.interfaces import Tokenizer, Vectorizer
+from src.core.parallel import effective_n_jobs, parallel_transform
+from src.core.vocabulary import MappedVocabulary, map_packed_tokens, pack_tokens
 
 class CountVectorizer(Vectorizer):
     """
     Represents documents as vectors of token counts.
     """
 
-    def __init__(self, tokenizer: Tokenizer):
+    def __init__(self, tokenizer: Tokenizer, sparse: bool = False, n_jobs: int = 1):
+        """
+        Args:
+            tokenizer: A Tokenizer instance used to split documents.
+            sparse: If True, transform() returns a scipy.sparse.csr_matrix
+                instead of a dense list of lists.
+            n_jobs: The number of worker processes transform() shards documents
+                across; 1 runs serially and -1 uses every CPU.
+        """
         self._tokenizer = tokenizer
-        self.vocabulary_: Dict[str, int] = {}
+        self.sparse_output = sparse
+        self.n_jobs = n_jobs
+        # A dict once fitted; a MappedVocabulary over the saved arrays once loaded
+        self._vocabulary: Union[Dict[str, int], MappedVocabulary] = {}
+        # Tokens seen by partial_fit that are not in _vocabulary yet; they are
+        # merged into it on the next access to vocabulary_
+        self._new_tokens: Set[str] = set()
+
+    @property
+    def vocabulary_(self) -> Union[Dict[str, int], MappedVocabulary]:
+        """
+        The mapping from token to column index, in sorted token order.
+        """
+        if self._new_tokens:
+            self._merge_new_tokens()
+        return self._vocabulary
+
+    @vocabulary_.setter
+    def vocabulary_(self, vocabulary: Union[Dict[str, int], MappedVocabulary]) -> None:
+        self._vocabulary = vocabulary
+        self._new_tokens = set()
+
+    def _merge_new_tokens(self) -> None:
+        # Sort tokens to ensure consistent indexing. The current vocabulary
+        # is already sorted, so this is mostly a merge of two sorted runs.
+        sorted_tokens = sorted([*self._vocabulary, *self._new_tokens])
+        self._vocabulary = {token: i for i, token in enumerate(sorted_tokens)}
+        # Rebind rather than clear(): a serial copy may share the set
+        self._new_tokens = set()
+
+    def serial_copy(self) -> "CountVectorizer":
+        if self._new_tokens:
+            self._merge_new_tokens()
+        return super().serial_copy()
 
-    def fit(self, corpus: List[str]) -> None:
+    def fit(self, corpus: Iterable[str]) -> None:
         """
         Builds the vocabulary from a corpus of documents.
         """
-        all_tokens = set()
-        for doc in corpus:
-            tokens = self._tokenizer.tokenize(doc)
+        self.vocabulary_ = {}
+        self.partial_fit(corpus)
+
+    def partial_fit(self, corpus: Iterable[str]) -> None:
+        """
+        Extends the vocabulary with the tokens of another batch of documents.
+
+        Column indices follow the sorted order of all tokens seen so far, so
+        matrices transformed before a partial_fit that added new tokens are
+        not aligned with matrices transformed after it.
+
+        New tokens are only collected here; the sorted vocabulary is rebuilt
+        once, on the next transform() or get_state(), so streaming many small
+        batches does not re-sort the vocabulary after each of them.
+        """
+        vocabulary = self._vocabulary
+        new_tokens = self._new_tokens
+        for tokens in self._tokenizer.tokenize_iter(corpus):
             for token in tokens:
-                all_tokens.add(token)
-        
-        # Sort tokens to ensure consistent indexing
-        sorted_tokens = sorted(list(all_tokens))
-        
-        self.vocabulary_ = {token: i for i, token in enumerate(sorted_tokens)}
+                if token not in vocabulary:
+                    new_tokens.add(token)
 
-    def transform(self, documents: List[str]) -> List[List[int]]:
+    def transform(self, documents: List[str]) -> Union[List[List[int]], csr_matrix]:
         """
         Transforms documents into count vectors based on the fitted vocabulary.
         """
         if not self.vocabulary_:
             raise RuntimeError("Vectorizer has not been fitted yet. Call fit() first.")
 
+        if effective_n_jobs(self.n_jobs) > 1:
+            return parallel_transform(self, documents, self.n_jobs)
+
+        if self.sparse_output:
+            return self._transform_sparse(documents)
+
         doc_vectors = []
-        vocab_size = len(self.vocabulary_)
+        vocabulary = self.vocabulary_
+        vocab_size = len(vocabulary)
 
-        for doc in documents:
+        for tokens in self._tokenizer.tokenize_iter(documents):
             vector = [0] * vocab_size
-            tokens = self._tokenizer.tokenize(doc)
             for token in tokens:
-                if token in self.vocabulary_:
-                    token_index = self.vocabulary_[token]
+                if token in vocabulary:
+                    token_index = vocabulary[token]
                     vector[token_index] += 1
             doc_vectors.append(vector)
             
         return doc_vectors
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        blob, offsets, sorted_ids = pack_tokens(list(self.vocabulary_))
+        return {"token_bytes": blob, "token_offsets": offsets, "token_sorted_ids": sorted_ids}
+
+    def set_state(self, arrays: Dict[str, np.ndarray]) -> None:
+        # Tokens are looked up in the (possibly memory-mapped) arrays in place,
+        # so the vocabulary is not copied into a private dict
+        self.vocabulary_ = map_packed_tokens(arrays["token_bytes"], arrays["token_offsets"],
+                                             arrays.get("token_sorted_ids"))
+
+    def _transform_sparse(self, documents: List[str]) -> csr_matrix:
+        """
+        Builds a CSR count matrix in one pass, only touching the terms present
+        in each document.
+        """
+        return build_count_matrix(self._tokenizer, self.vocabulary_, documents)
+
+
+def build_count_matrix(tokenizer: Tokenizer, vocabulary: Mapping[str, int],
+                       documents: Iterable[str]) -> csr_matrix:
+    """
+    Tokenizes documents and counts in-vocabulary tokens into a CSR matrix.
+
+    The indices/indptr/data arrays are filled in a single pass over the
+    documents, so the cost per document scales with its length rather than
+    with the vocabulary size.
+
+    Args:
+        tokenizer: The Tokenizer used to split each document.
+        vocabulary: A mapping from token to column index.
+        documents: The documents to count.
+
+    Returns:
+        An int32 csr_matrix of shape (n_documents, len(vocabulary)) with
+        sorted column indices in each row.
+    """
+    indices = array('i')
+    data = array('i')
+    indptr = array('q', [0])
+
+    for tokens in tokenizer.tokenize_iter(documents):
+        counts: Dict[int, int] = {}
+        for token in tokens:
+            token_index = vocabulary.get(token)
+            if token_index is not None:
+                counts[token_index] = counts.get(token_index, 0) + 1
+        # Sorted column indices keep the matrix in canonical CSR form
+        for token_index in sorted(counts):
+            indices.append(token_index)
+            data.append(counts[token_index])
+        indptr.append(len(indices))
+
+    return csr_matrix(
+        (np.frombuffer(data, dtype=np.int32),
+         np.frombuffer(indices, dtype=np.int32),
+         np.frombuffer(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, len(vocabulary)),
+    )
@@ -0,0 +1,163 @@
+import os
+from typing import List, Optional, Tuple, Union
+import numpy as np
+from src.core.manifest import read_manifest, write_manifest
+from src.core.vocabulary import MappedVocabulary, Vocabulary, pack_tokens
+
+# Version of the directory layout written by EmbeddingStore.save
+STORE_FORMAT_VERSION = 1
+STORE_MANIFEST = "embeddings.json"
+STORE_DTYPES = ("float32", "float16")
+# Rows converted to float32 at a time when scanning every vector
+_CHUNK_ROWS = 8192
+
+
+class EmbeddingStore:
+    """
+    A read-only table of word vectors that can be memory-mapped from disk.
+
+    The store keeps the vectors as one (n_words, vector_size) matrix and the
+    words in a Vocabulary (or a MappedVocabulary over packed arrays). It
+    implements the parts of gensim's KeyedVectors that WordEmbedder uses
+    (indexing, key_to_index, vectors, similarity, most_similar), so loaded
+    stores are drop-in replacements.
+
+    Saved stores are a directory of .npy files plus a small JSON manifest.
+    load() maps the files read-only, so opening a store is instant and
+    processes that open the same store share one copy of it in the OS page
+    cache instead of each holding a private one.
+    """
+
+    def __init__(self, vectors: np.ndarray, vocabulary: Union[Vocabulary, MappedVocabulary]):
+        """
+        Args:
+            vectors: One row per word, in vocabulary ID order.
+            vocabulary: Maps each word to its row.
+        """
+        if len(vocabulary) != len(vectors):
+            raise ValueError(f"Vocabulary has {len(vocabulary)} words but there are {len(vectors)} vectors.")
+        self.vectors = vectors
+        self.vocabulary = vocabulary
+        self.vector_size = vectors.shape[1]
+        self._norms: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_keyed_vectors(cls, keyed_vectors) -> "EmbeddingStore":
+        """
+        Copies a gensim KeyedVectors model into a store.
+        """
+        return cls(keyed_vectors.vectors, Vocabulary(keyed_vectors.index_to_key))
+
+    @property
+    def key_to_index(self) -> Union[Vocabulary, MappedVocabulary]:
+        """The vocabulary, which supports the mapping lookups of KeyedVectors.key_to_index."""
+        return self.vocabulary
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.vocabulary
+
+    def __getitem__(self, word: str) -> np.ndarray:
+        """
+        Returns a word's vector as float32; raises KeyError for unknown words.
+        """
+        return np.asarray(self.vectors[self.vocabulary[word]], dtype=np.float32)
+
+    def similarity(self, word1: str, word2: str) -> float:
+        """
+        Returns the cosine similarity between two words.
+        """
+        v1, v2 = self[word1], self[word2]
+        return float(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
+
+    def most_similar(self, word: str, topn: int = 10) -> List[Tuple[str, float]]:
+        """
+        Returns the topn words with the highest cosine similarity to a word.
+
+        The vectors are scored in fixed-size row chunks, so a float16 or
+        mapped store is never upcast (or read into private memory) as a whole.
+        """
+        row = self.vocabulary[word]
+        norms = self.norms()
+        query = self[word] / norms[row]
+        similarities = np.empty(len(self.vectors), dtype=np.float32)
+        for start in range(0, len(self.vectors), _CHUNK_ROWS):
+            block = np.asarray(self.vectors[start:start + _CHUNK_ROWS], dtype=np.float32)
+            similarities[start:start + _CHUNK_ROWS] = block @ query
+        similarities /= norms
+        similarities[row] = -np.inf
+        topn = min(topn, len(similarities) - 1)
+        if topn <= 0:
+            return []
+        top = np.argpartition(-similarities, topn - 1)[:topn]
+        top = top[np.argsort(-similarities[top], kind="stable")]
+        return [(self.vocabulary.lookup_token(int(i)), float(similarities[i])) for i in top]
+
+    def norms(self) -> np.ndarray:
+        """
+        Returns the L2 norm of every vector (zero norms as 1), computed on first use.
+
+        Only the norms are kept in memory; the vectors themselves are not
+        copied, so a mapped store stays shared.
+        """
+        if self._norms is None:
+            norms = np.empty(len(self.vectors), dtype=np.float32)
+            for start in range(0, len(self.vectors), _CHUNK_ROWS):
+                block = np.asarray(self.vectors[start:start + _CHUNK_ROWS], dtype=np.float32)
+                norms[start:start + _CHUNK_ROWS] = np.linalg.norm(block, axis=1)
+            norms[norms == 0] = 1.0
+            self._norms = norms
+        return self._norms
+
+    def save(self, path: str, dtype: str = "float32") -> None:
+        """
+        Writes the store to a directory.
+
+        Args:
+            path: The directory to write; created if needed.
+            dtype: "float32", or "float16" to halve the file size (and the
+                memory shared by processes) at a small cost in precision.
+        """
+        if dtype not in STORE_DTYPES:
+            raise ValueError(f"Unsupported dtype '{dtype}'. Choose from: {list(STORE_DTYPES)}")
+        os.makedirs(path, exist_ok=True)
+        blob, offsets, sorted_ids = pack_tokens(list(self.vocabulary))
+        arrays = {
+            "vectors": np.asarray(self.vectors, dtype=dtype),
+            "token_bytes": blob,
+            "token_offsets": offsets,
+            "token_sorted_ids": sorted_ids,
+        }
+        for name, values in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), values, allow_pickle=False)
+        manifest = {
+            "num_words": len(self.vectors),
+            "vector_size": self.vector_size,
+            "dtype": dtype,
+        }
+        write_manifest(os.path.join(path, STORE_MANIFEST), manifest, STORE_FORMAT_VERSION)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "EmbeddingStore":
+        """
+        Opens a store written by save().
+
+        Args:
+            path: The directory written by save().
+            mmap: If True, map the arrays read-only instead of reading them.
+        """
+        read_store_manifest(path)
+        mmap_mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+                  for name in ("vectors", "token_bytes", "token_offsets", "token_sorted_ids")}
+        vocabulary = MappedVocabulary(arrays["token_bytes"], arrays["token_offsets"], arrays["token_sorted_ids"])
+        return cls(arrays["vectors"], vocabulary)
+
+
+def read_store_manifest(path: str) -> dict:
+    """
+    Reads and checks the manifest of a saved store without opening its arrays.
+    """
+    return read_manifest(os.path.join(path, STORE_MANIFEST), STORE_FORMAT_VERSION)
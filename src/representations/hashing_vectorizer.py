@@ -0,0 +1,157 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple, Union
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.utils import murmurhash3_32
+from src.core.interfaces import Tokenizer, Vectorizer
+from src.core.parallel import effective_n_jobs, parallel_transform
+from src.core.weighting import l2_normalize_rows, smoothed_idf
+
+class HashingVectorizer(Vectorizer):
+    """
+    Represents documents as vectors of hashed token counts.
+
+    Tokens are mapped to one of n_features columns with MurmurHash3 instead of
+    a learned vocabulary (the "hashing trick", as in Spark's HashingTF), so the
+    vectorizer needs no fitting and its memory use does not grow with the
+    vocabulary. Distinct tokens may collide in the same column.
+    """
+
+    def __init__(self, tokenizer: Tokenizer, n_features: int = 20000,
+                 alternate_sign: bool = True, use_idf: bool = False,
+                 sparse: bool = True, n_jobs: int = 1):
+        """
+        Args:
+            tokenizer: A Tokenizer instance used to split documents.
+            n_features: The number of columns in the output vectors.
+            alternate_sign: If True, the sign of the hash decides whether a
+                token adds +1 or -1, so collisions tend to cancel out instead
+                of accumulating.
+            use_idf: If True, fit() learns IDF weights per column and
+                transform() returns L2-normalized TF-IDF vectors.
+            sparse: If True, transform() returns a scipy.sparse.csr_matrix
+                instead of a dense list of lists.
+            n_jobs: The number of worker processes transform() shards documents
+                across; 1 runs serially and -1 uses every CPU.
+        """
+        if n_features < 1:
+            raise ValueError("n_features must be at least 1.")
+        self._tokenizer = tokenizer
+        self.n_features = n_features
+        self.alternate_sign = alternate_sign
+        self.use_idf = use_idf
+        self.sparse_output = sparse
+        self.n_jobs = n_jobs
+        self.idf_: np.ndarray = np.empty(0, dtype=np.float64)
+        self._doc_freq = np.zeros(0, dtype=np.int64)
+        self._num_docs = 0
+
+    def fit(self, corpus: Iterable[str]) -> None:
+        """
+        Learns IDF weights for each hashed column when use_idf is set;
+        otherwise this is a no-op.
+        """
+        self._doc_freq = np.zeros(self.n_features, dtype=np.int64)
+        self._num_docs = 0
+        self.partial_fit(corpus)
+
+    def partial_fit(self, corpus: Iterable[str]) -> None:
+        """
+        Updates the per-column document frequencies and IDF weights with
+        another batch of documents when use_idf is set.
+        """
+        if not self.use_idf:
+            return
+        if self._doc_freq.size != self.n_features:
+            self._doc_freq = np.zeros(self.n_features, dtype=np.int64)
+
+        counts = self._hash_counts(corpus)
+        # Each document contributes at most 1 to a column
+        self._doc_freq += np.bincount(counts.indices, minlength=self.n_features)
+        self._num_docs += counts.shape[0]
+
+        self.idf_ = smoothed_idf(self._doc_freq, self._num_docs)
+
+    def transform(self, documents: Iterable[str]) -> Union[List[List[float]], csr_matrix]:
+        """
+        Transforms documents into hashed count (or TF-IDF) vectors.
+
+        Without use_idf the result depends only on the documents and the
+        constructor arguments, so batches can be transformed independently
+        in separate processes.
+        """
+        if self.use_idf and not self.idf_.size:
+            raise RuntimeError("Vectorizer has not been fitted yet. Call fit() first.")
+
+        if effective_n_jobs(self.n_jobs) > 1:
+            return parallel_transform(self, documents, self.n_jobs)
+
+        matrix = self._hash_counts(documents)
+        if self.use_idf:
+            matrix = self._apply_idf(matrix)
+
+        if self.sparse_output:
+            return matrix
+        return matrix.toarray().tolist()
+
+    def get_params(self) -> Dict[str, Any]:
+        params = super().get_params()
+        params.update(n_features=self.n_features, alternate_sign=self.alternate_sign, use_idf=self.use_idf)
+        return params
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {
+            "idf": self.idf_,
+            "doc_freq": self._doc_freq,
+            "num_docs": np.array(self._num_docs, dtype=np.int64),
+        }
+
+    def set_state(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.idf_ = arrays["idf"]
+        # partial_fit updates the frequencies in place, so they must be writable
+        self._doc_freq = np.array(arrays["doc_freq"])
+        self._num_docs = int(arrays["num_docs"])
+
+    def _hash_counts(self, documents: Iterable[str]) -> csr_matrix:
+        """
+        Builds the (signed) hashed count matrix in CSR form in a single pass.
+        """
+        n_features = self.n_features
+        alternate_sign = self.alternate_sign
+        # Per-call cache so repeated tokens are hashed once without sharing
+        # any state between calls
+        hashed: Dict[str, Tuple[int, int]] = {}
+        indices = array('i')
+        data = array('d')
+        indptr = array('q', [0])
+
+        for tokens in self._tokenizer.tokenize_iter(documents):
+            counts: Dict[int, int] = {}
+            for token in tokens:
+                bucket = hashed.get(token)
+                if bucket is None:
+                    h = murmurhash3_32(token, seed=0)
+                    sign = -1 if alternate_sign and h < 0 else 1
+                    bucket = hashed[token] = (abs(h) % n_features, sign)
+                column, sign = bucket
+                counts[column] = counts.get(column, 0) + sign
+            for column in sorted(counts):
+                # Signed collisions may cancel out to an explicit zero
+                if counts[column]:
+                    indices.append(column)
+                    data.append(counts[column])
+            indptr.append(len(indices))
+
+        return csr_matrix(
+            (np.frombuffer(data, dtype=np.float64),
+             np.frombuffer(indices, dtype=np.int32),
+             np.frombuffer(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, n_features),
+        )
+
+    def _apply_idf(self, counts: csr_matrix) -> csr_matrix:
+        """
+        Weights hashed counts by IDF and L2-normalizes each row.
+        """
+        data = counts.data * self.idf_[counts.indices]
+        return l2_normalize_rows(csr_matrix((data, counts.indices, counts.indptr), shape=counts.shape))
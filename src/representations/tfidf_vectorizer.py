@@ -1,66 +1,157 @@
 import math
-from typing import List, Dict
+from collections import Counter
+from typing import Iterable, List, Dict, Optional, Union
+import numpy as np
+from scipy.sparse import csr_matrix
 from src.core.interfaces import Tokenizer, Vectorizer
+from src.core.parallel import effective_n_jobs, parallel_transform
+from src.core.vocabulary import MappedVocabulary, map_packed_tokens, pack_tokens
+from src.core.weighting import l2_normalize_rows, smoothed_idf
+from src.representations.count_vectorizer import build_count_matrix
 
 class TfidfVectorizer(Vectorizer):
     """
     Represents documents as vectors of TF-IDF scores.
     """
 
-    def __init__(self, tokenizer: Tokenizer):
+    def __init__(self, tokenizer: Tokenizer, sparse: bool = False, n_jobs: int = 1):
+        """
+        Args:
+            tokenizer: A Tokenizer instance used to split documents.
+            sparse: If True, transform() returns an L2-normalized
+                scipy.sparse.csr_matrix instead of a dense list of lists.
+            n_jobs: The number of worker processes transform() shards documents
+                across; 1 runs serially and -1 uses every CPU.
+        """
         self._tokenizer = tokenizer
-        self.vocabulary_: Dict[str, int] = {}
-        self.idf_: Dict[str, float] = {}
+        self.sparse_output = sparse
+        self.n_jobs = n_jobs
+        # A dict once fitted; a MappedVocabulary over the saved arrays once loaded
+        self._vocabulary: Union[Dict[str, int], MappedVocabulary] = {}
+        # IDF scores aligned with the vocabulary index: idf_[vocabulary_[token]]
+        self._idf: np.ndarray = np.empty(0, dtype=np.float64)
+        # Running statistics kept so partial_fit can update the IDF incrementally.
+        # A loaded vectorizer keeps the saved per-token frequencies as an array
+        # and only builds the Counter if partial_fit is called.
+        self._doc_freq: Optional[Counter] = Counter()
+        self._saved_doc_freq: Optional[np.ndarray] = None
+        self._num_docs = 0
+        # Set by partial_fit; the vocabulary and IDF are rebuilt on next access
+        self._stale = False
+
+    @property
+    def vocabulary_(self) -> Union[Dict[str, int], MappedVocabulary]:
+        """
+        The mapping from token to column index, in sorted token order.
+        """
+        if self._stale:
+            self._refresh()
+        return self._vocabulary
+
+    @vocabulary_.setter
+    def vocabulary_(self, vocabulary: Union[Dict[str, int], MappedVocabulary]) -> None:
+        self._vocabulary = vocabulary
+        self._stale = False
+
+    @property
+    def idf_(self) -> np.ndarray:
+        """
+        The IDF score of each vocabulary column.
+        """
+        if self._stale:
+            self._refresh()
+        return self._idf
+
+    @idf_.setter
+    def idf_(self, idf: np.ndarray) -> None:
+        self._idf = idf
+        self._stale = False
 
-    def fit(self, corpus: List[str]) -> None:
+    def serial_copy(self) -> "TfidfVectorizer":
+        if self._stale:
+            self._refresh()
+        serial = super().serial_copy()
+        # transform() only needs the vocabulary and IDF, so the running
+        # document frequencies are not shipped to worker processes
+        serial._doc_freq = None
+        serial._saved_doc_freq = None
+        return serial
+
+    def fit(self, corpus: Iterable[str]) -> None:
         """
         Builds the vocabulary and calculates IDF scores for each term.
         """
-        # First, build vocabulary and get term frequencies per document
-        all_tokens = set()
-        doc_term_counts = []
-        for doc in corpus:
-            tokens = self._tokenizer.tokenize(doc)
-            doc_term_counts.append({t: tokens.count(t) for t in set(tokens)})
-            for token in tokens:
-                all_tokens.add(token)
-        
-        sorted_tokens = sorted(list(all_tokens))
-        self.vocabulary_ = {token: i for i, token in enumerate(sorted_tokens)}
+        self._vocabulary = {}
+        self._idf = np.empty(0, dtype=np.float64)
+        self._doc_freq = Counter()
+        self._saved_doc_freq = None
+        self._num_docs = 0
+        self.partial_fit(corpus)
+
+    def partial_fit(self, corpus: Iterable[str]) -> None:
+        """
+        Updates the document frequencies with another batch of documents.
+
+        The vocabulary and IDF scores are rebuilt from them once, on the next
+        transform() or get_state(), so streaming many small batches does not
+        re-sort the vocabulary and recompute every IDF after each of them.
+        """
+        # Count document frequencies in a single pass; each document only
+        # contributes its set of unique tokens.
+        doc_freq = self._doc_frequencies()
+        num_docs = self._num_docs
+        for tokens in self._tokenizer.tokenize_iter(corpus):
+            doc_freq.update(set(tokens))
+            num_docs += 1
+        self._num_docs = num_docs
+        self._stale = True
+
+    def _refresh(self) -> None:
+        """
+        Rebuilds the sorted vocabulary (if partial_fit saw new tokens) and the
+        IDF scores from the accumulated document frequencies.
+        """
+        doc_freq = self._doc_freq
+        # Every vocabulary token has a document frequency, so the vocabulary
+        # only needs rebuilding when the Counter has grown past it
+        if len(doc_freq) != len(self._vocabulary):
+            self._vocabulary = {token: i for i, token in enumerate(sorted(doc_freq))}
+        tokens = self._vocabulary
 
         # Now, calculate IDF scores
-        num_docs = len(corpus)
-        doc_freq = {token: 0 for token in self.vocabulary_}
-        for token in self.vocabulary_:
-            for doc_counts in doc_term_counts:
-                if token in doc_counts:
-                    doc_freq[token] += 1
-        
-        for token, df in doc_freq.items():
-            # Add 1 for smoothing
-            self.idf_[token] = math.log(num_docs / (df + 1)) + 1 # Add 1 to the result to avoid zero IDF
-
-    def transform(self, documents: List[str]) -> List[List[float]]:
+        df = np.fromiter((doc_freq[token] for token in tokens),
+                         dtype=np.float64, count=len(tokens))
+        self._idf = smoothed_idf(df, self._num_docs)
+        self._stale = False
+
+    def transform(self, documents: List[str]) -> Union[List[List[float]], csr_matrix]:
         """
         Transforms documents into TF-IDF vectors.
         """
-        if not self.vocabulary_ or not self.idf_:
+        if not self.vocabulary_ or not self.idf_.size:
             raise RuntimeError("Vectorizer has not been fitted yet. Call fit() first.")
 
+        if effective_n_jobs(self.n_jobs) > 1:
+            return parallel_transform(self, documents, self.n_jobs)
+
+        if self.sparse_output:
+            return self._transform_sparse(documents)
+
         doc_vectors = []
-        vocab_size = len(self.vocabulary_)
+        vocabulary = self.vocabulary_
+        vocab_size = len(vocabulary)
+        idf = self.idf_.tolist()
 
-        for doc in documents:
+        for tokens in self._tokenizer.tokenize_iter(documents):
             # Calculate Term Frequency (TF)
             tf_vector = [0] * vocab_size
-            tokens = self._tokenizer.tokenize(doc)
             for token in tokens:
-                if token in self.vocabulary_:
-                    token_index = self.vocabulary_[token]
+                if token in vocabulary:
+                    token_index = vocabulary[token]
                     tf_vector[token_index] += 1
             
             # Calculate TF-IDF
-            tfidf_vector = [tf * self.idf_.get(token, 0) for token, tf in zip(self.vocabulary_.keys(), tf_vector)]
+            tfidf_vector = [tf * idf for tf, idf in zip(tf_vector, idf)]
 
             # L2 Normalization (Bonus)
             norm = math.sqrt(sum(x*x for x in tfidf_vector))
@@ -71,3 +162,52 @@ class TfidfVectorizer(Vectorizer):
                 doc_vectors.append(tfidf_vector) # Append zero vector if norm is zero
             
         return doc_vectors
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        tokens = list(self.vocabulary_)
+        blob, offsets, sorted_ids = pack_tokens(tokens)
+        if self._doc_freq is None:
+            doc_freq = self._saved_doc_freq
+        else:
+            doc_freq = np.fromiter((self._doc_freq[token] for token in tokens),
+                                   dtype=np.int64, count=len(tokens))
+        return {
+            "token_bytes": blob,
+            "token_offsets": offsets,
+            "token_sorted_ids": sorted_ids,
+            "idf": self.idf_,
+            "doc_freq": doc_freq,
+            "num_docs": np.array(self._num_docs, dtype=np.int64),
+        }
+
+    def set_state(self, arrays: Dict[str, np.ndarray]) -> None:
+        # Tokens are looked up in the (possibly memory-mapped) arrays in place,
+        # so the vocabulary is not copied into a private dict
+        self._vocabulary = map_packed_tokens(arrays["token_bytes"], arrays["token_offsets"],
+                                             arrays.get("token_sorted_ids"))
+        self._idf = arrays["idf"]
+        self._stale = False
+        self._doc_freq = None
+        self._saved_doc_freq = arrays["doc_freq"]
+        self._num_docs = int(arrays["num_docs"])
+
+    def _doc_frequencies(self) -> Counter:
+        """
+        Returns the document frequency Counter, building it from the saved
+        arrays on first use after set_state().
+        """
+        if self._doc_freq is None:
+            self._doc_freq = Counter(dict(zip(self._vocabulary, self._saved_doc_freq.tolist())))
+            self._saved_doc_freq = None
+        return self._doc_freq
+
+    def _transform_sparse(self, documents: List[str]) -> csr_matrix:
+        """
+        Builds the TF-IDF matrix in CSR form, touching only the nonzero terms
+        of each document.
+        """
+        counts = build_count_matrix(self._tokenizer, self.vocabulary_, documents)
+
+        # Apply IDF by an indexed multiply over the stored entries only
+        data = counts.data * self.idf_[counts.indices]
+        return l2_normalize_rows(csr_matrix((data, counts.indices, counts.indptr), shape=counts.shape))
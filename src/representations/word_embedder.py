@@ -1,28 +1,83 @@
 import numpy as np
 import gensim.downloader as api
-from typing import List
+from array import array
+from typing import Iterable, List, Optional
 from src.core.interfaces import Tokenizer
+from src.core.vocabulary import Vocabulary
+from src.core.weighting import smoothed_idf
+from src.representations.ann_index import ExactIndex, IVFFlatIndex, NearestNeighborIndex
+from src.representations.embedding_store import EmbeddingStore, read_store_manifest
+
+DOCUMENT_WEIGHTINGS = ("tfidf", "sif")
 
 class WordEmbedder:
     """
     A class to handle loading and using pre-trained word embeddings.
     """
 
-    def __init__(self, model_name: str = 'glove-wiki-gigaword-50'):
+    def __init__(self, model_name: str = 'glove-wiki-gigaword-50', path: Optional[str] = None):
         """
-        Loads a pre-trained model from gensim's repository.
+        Loads a pre-trained model from gensim's repository, or prepares to
+        open a local EmbeddingStore.
 
         Args:
             model_name: The name of the model to load.
+            path: A directory written by save_store() or EmbeddingStore.save().
+                If given, model_name is ignored, nothing is downloaded, and
+                the store is memory-mapped on first lookup, so worker processes
+                start instantly and share one page-cached copy of the vectors.
         """
+        self._model = None
+        self._path = path
+        # Optional index answering get_most_similar / most_similar_batch
+        self.index: Optional[NearestNeighborIndex] = None
+        # Exact fallback for most_similar_batch, built on first use
+        self._exact_index: Optional[ExactIndex] = None
+        if path is not None:
+            self.vector_size = read_store_manifest(path)["vector_size"]
+            return
+
         try:
-            self.model = api.load(model_name)
-            self.vector_size = self.model.vector_size
+            self._model = api.load(model_name)
+            self.vector_size = self._model.vector_size
         except ValueError as e:
             print(f"Error loading model: {e}")
             print(f"Please choose from available models: {list(api.info()['models'].keys())}")
             raise
 
+    @property
+    def model(self):
+        """The gensim KeyedVectors or EmbeddingStore, opened on first access."""
+        if self._model is None:
+            self._model = EmbeddingStore.load(self._path)
+        return self._model
+
+    @model.setter
+    def model(self, model) -> None:
+        """
+        Replaces the vectors, e.g. with KeyedVectors loaded elsewhere. Any
+        index built over the previous vectors is dropped.
+        """
+        self._model = model
+        self._path = None
+        self.vector_size = model.vector_size
+        self.index = None
+        self._exact_index = None
+
+    def save_store(self, path: str, dtype: str = "float32") -> None:
+        """
+        Saves the loaded vectors as a local EmbeddingStore, to be opened later
+        with WordEmbedder(path=path) without network access.
+
+        Args:
+            path: The directory to write.
+            dtype: "float32", or "float16" for half the size.
+        """
+        model = self.model
+        if not isinstance(model, EmbeddingStore):
+            model = EmbeddingStore.from_keyed_vectors(model)
+        model.save(path, dtype=dtype)
+
     def get_vector(self, word: str) -> np.ndarray:
         """
         Gets the vector for a single word.
@@ -53,10 +108,77 @@ class WordEmbedder:
         """
         Finds the most similar words to a given word.
 
+        Uses self.index when one is set (see build_index()); otherwise the
+        model's exact most_similar.
+
         Returns:
             A list of (word, similarity_score) tuples.
         """
-        return self.model.most_similar(word, topn=top_n)
+        if self.index is None:
+            return self.model.most_similar(word, topn=top_n)
+        row = self.model.key_to_index[word]
+        return self._neighbors(self.index, [row], top_n)[0]
+
+    def most_similar_batch(self, words: List[str], k: int = 10) -> List[List[tuple[str, float]]]:
+        """
+        Finds the k most similar words for many words in one search.
+
+        Uses self.index when one is set, otherwise an exact search that scores
+        the queries against the vocabulary in blocks (its vector norms are
+        computed once and kept on the embedder).
+
+        Returns:
+            One list of (word, similarity_score) tuples per word; empty for
+            out-of-vocabulary words.
+        """
+        key_to_index = self.model.key_to_index
+        rows = [key_to_index.get(word) for word in words]
+        known = [row for row in rows if row is not None]
+        index = self.index
+        if index is None:
+            if self._exact_index is None:
+                self._exact_index = ExactIndex(self.model.vectors)
+            index = self._exact_index
+        neighbors = iter(self._neighbors(index, known, k)) if known else iter(())
+        return [[] if row is None else next(neighbors) for row in rows]
+
+    def build_index(self, n_lists: Optional[int] = None, n_probe: int = 8) -> IVFFlatIndex:
+        """
+        Builds an IVFFlatIndex over the model's vectors and uses it for
+        similarity queries from now on.
+
+        Args:
+            n_lists: The number of index cells; defaults to about sqrt(vocabulary size).
+            n_probe: Cells searched per query; more is slower but more accurate.
+
+        Returns:
+            The index, e.g. to save() it for load_index().
+        """
+        self.index = IVFFlatIndex(n_lists=n_lists, n_probe=n_probe).build(self.model.vectors)
+        return self.index
+
+    def load_index(self, path: str) -> None:
+        """
+        Uses an IVFFlatIndex saved from the same vectors, memory-mapped.
+
+        Raises:
+            ValueError: If the index was built from different vectors.
+        """
+        index = IVFFlatIndex.load(path)
+        index.check_vectors(self.model.vectors)
+        self.index = index
+
+    def _neighbors(self, index: NearestNeighborIndex, rows: List[int], k: int) -> List[List[tuple[str, float]]]:
+        """
+        Searches the vectors of the given rows, leaving each row out of its own results.
+        """
+        queries = np.asarray(self.model.vectors[np.asarray(rows)], dtype=np.float32)
+        ids, similarities = index.search(queries, k, exclude=rows)
+        # gensim KeyedVectors list their words; an EmbeddingStore decodes them
+        word_at = (self.model.index_to_key.__getitem__ if hasattr(self.model, "index_to_key")
+                   else self.model.vocabulary.lookup_token)
+        return [[(word_at(i), similarity) for i, similarity in zip(row_ids, row_similarities) if i >= 0]
+                for row_ids, row_similarities in zip(ids.tolist(), similarities.tolist())]
 
     def embed_document(self, document: str, tokenizer: Tokenizer) -> np.ndarray:
         """
@@ -80,3 +202,100 @@ class WordEmbedder:
         
         # Return the element-wise mean of the vectors
         return np.mean(valid_vectors, axis=0)
+
+    def embed_documents(self, texts: Iterable[str], tokenizer: Tokenizer, weighting: Optional[str] = None,
+                        vocabulary: Optional[Vocabulary] = None, sif_a: float = 1e-3) -> np.ndarray:
+        """
+        Embeds many documents at once as (weighted) means of their word vectors.
+
+        Tokens are mapped to rows of the model's vector matrix with one dict
+        lookup each; OOV tokens are dropped. The vectors of all documents are
+        then gathered with a single fancy index and summed per document with
+        np.add.reduceat, so the cost is a few NumPy calls per batch rather
+        than several Python calls per token.
+
+        Word weights come from a fitted vocabulary rather than from the batch
+        itself, so a document gets the same embedding whatever it is batched with.
+
+        Args:
+            texts: The documents to embed.
+            tokenizer: A tokenizer instance to split the documents.
+            weighting: None for a plain mean (like embed_document), "tfidf" to
+                weight each token by its IDF, or "sif" for the smooth inverse
+                frequency weight a / (a + p(word)).
+            vocabulary: Required with a weighting: a Vocabulary whose
+                frequencies were counted on a reference corpus, e.g. with
+                tokenizer.encode(corpus, vocabulary, add=True). "tfidf" uses its
+                document frequencies (with TfidfVectorizer's smoothing) and
+                "sif" its term frequencies. Words it has never seen get the
+                weight of a word with zero frequency.
+            sif_a: The constant a of SIF weighting.
+
+        Returns:
+            A float32 array of shape (n_documents, vector_size). Documents
+            without any in-vocabulary token get a zero row.
+        """
+        word_weights = None if weighting is None else self._word_weights(weighting, vocabulary, sif_a)
+
+        key_to_index = self.model.key_to_index
+        rows = array('i')
+        # Vocabulary IDs of the kept tokens, -1 for words it has not seen
+        weight_ids = array('i')
+        lengths = array('q')
+        for tokens in tokenizer.tokenize_iter(texts):
+            before = len(rows)
+            for token in tokens:
+                row = key_to_index.get(token)
+                if row is not None:
+                    rows.append(row)
+                    if word_weights is not None:
+                        weight_ids.append(vocabulary.get(token, -1))
+            lengths.append(len(rows) - before)
+
+        rows = np.frombuffer(rows, dtype=np.int32)
+        lengths = np.frombuffer(lengths, dtype=np.int64)
+        embeddings = np.zeros((len(lengths), self.vector_size), dtype=np.float32)
+        if not len(rows):
+            return embeddings
+
+        if word_weights is None:
+            weights = np.ones(len(rows), dtype=np.float32)
+        else:
+            weights = word_weights[np.frombuffer(weight_ids, dtype=np.int32)]
+
+        vectors = self.model.vectors[rows] * weights[:, None]
+        nonempty = lengths > 0
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))[nonempty]
+        sums = np.add.reduceat(vectors, starts, axis=0)
+        weight_sums = np.add.reduceat(weights, starts)
+        weight_sums[weight_sums == 0] = 1.0
+        embeddings[nonempty] = sums / weight_sums[:, None]
+        return embeddings
+
+    @staticmethod
+    def _word_weights(weighting: str, vocabulary: Optional[Vocabulary], sif_a: float) -> np.ndarray:
+        """
+        Returns the weight of every vocabulary ID under a weighting, followed
+        by the weight of a word the vocabulary has not seen, so that ID -1
+        indexes it.
+        """
+        if weighting not in DOCUMENT_WEIGHTINGS:
+            raise ValueError(f"Unknown weighting '{weighting}'. Choose from: {list(DOCUMENT_WEIGHTINGS)}")
+        if vocabulary is None:
+            raise ValueError(f"The '{weighting}' weighting needs a fitted vocabulary.")
+
+        if weighting == "tfidf":
+            if vocabulary.num_docs == 0:
+                raise ValueError("The vocabulary has no document counts. Build it with "
+                                 "tokenizer.encode(corpus, vocabulary, add=True).")
+            doc_freq = np.append(np.frombuffer(vocabulary.doc_counts, dtype=np.int64), 0)
+            # Same smoothing as TfidfVectorizer
+            weights = smoothed_idf(doc_freq, vocabulary.num_docs)
+        else:
+            counts = np.append(np.frombuffer(vocabulary.counts, dtype=np.int64), 0)
+            total = counts.sum()
+            if total == 0:
+                raise ValueError("The vocabulary has no token counts. Build it with "
+                                 "tokenizer.encode(corpus, vocabulary, add=True).")
+            weights = sif_a / (sif_a + counts / total)
+        return weights.astype(np.float32)
@@ -1,6 +1,8 @@
 import spacy
+from bisect import bisect_left, bisect_right
 from typing import List, Dict
 from src.core.dataset_loaders import load_conllu_data
+from src.core.interfaces import TokenSpans
 
 class NamedEntityRecognizer:
     """
@@ -43,6 +45,29 @@ class NamedEntityRecognizer:
             })
         return entities
 
+    def align_entities_to_tokens(self, entities: List[Dict], spans: TokenSpans) -> List[Dict]:
+        """
+        Maps entities to the tokens they cover using precomputed token offsets,
+        without tokenizing the text again.
+
+        Args:
+            entities: Entities as returned by recognize_entities().
+            spans: The output of a tokenizer's tokenize_with_offsets() on the same text.
+
+        Returns:
+            Copies of the entities with 'token_start' and 'token_end' keys added,
+            so that spans.tokens[token_start:token_end] are the tokens overlapping
+            the entity.
+        """
+        aligned = []
+        for entity in entities:
+            aligned.append({
+                **entity,
+                "token_start": bisect_right(spans.ends, entity["start"]),
+                "token_end": bisect_left(spans.starts, entity["end"]),
+            })
+        return aligned
+
     def load_and_prepare_conllu_data(self, file_path: str) -> List[List[Dict[str, str]]]:
         """
         Loads CoNLL-U data and prepares it for NER tasks.
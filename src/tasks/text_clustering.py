@@ -1,27 +1,286 @@
-from typing import List, Dict
-from collections import defaultdict
+from typing import List, Dict, Optional, Sequence
+from array import array
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
 from sklearn.cluster import KMeans
 from sklearn.metrics import silhouette_score
 
 from src.core.interfaces import Vectorizer
+from src.core.weighting import csr_row_norms, l2_normalize_rows
+
+CLUSTERING_ALGORITHMS = ("kmeans", "spherical_minibatch")
+
+class SphericalMiniBatchKMeans:
+    """
+    Mini-batch k-means with cosine similarity over sparse, L2-normalized rows.
+
+    Centroids are unit vectors. Each step draws a random batch of rows,
+    assigns them to the most similar centroid with a sparse-dense product,
+    moves every centroid towards the mean of its new members with a
+    per-centroid learning rate of 1 / (rows assigned so far), and
+    re-normalizes it. Only a batch is ever densified, so the data can stay
+    in a large CSR matrix.
+    """
+
+    def __init__(self, n_clusters: int, batch_size: int = 1024, max_iter: int = 100,
+                 tol: float = 1e-4, random_state: Optional[int] = 42):
+        """
+        Args:
+            n_clusters: The number of clusters.
+            batch_size: Rows per update step.
+            max_iter: The maximum number of update steps.
+            tol: Stop early once no centroid moves by more than this (in
+                Euclidean distance) in a step.
+            random_state: Seed for initialization and batch sampling.
+        """
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.max_iter = max_iter
+        self.tol = tol
+        self.random_state = random_state
+        self.cluster_centers_: Optional[np.ndarray] = None
+        self.counts_: Optional[np.ndarray] = None
+        self.labels_: Optional[np.ndarray] = None
+
+    def fit(self, X: csr_matrix) -> "SphericalMiniBatchKMeans":
+        """
+        Learns the centroids from the rows of X and labels every row.
+        """
+        X = normalize_rows(X)
+        n_rows = X.shape[0]
+        if n_rows < self.n_clusters:
+            raise ValueError(f"Need at least {self.n_clusters} documents, got {n_rows}.")
+        rng = np.random.default_rng(self.random_state)
+
+        centers = self._init_centers(X, rng)
+        counts = np.zeros(self.n_clusters, dtype=np.int64)
+        batch_size = min(self.batch_size, n_rows)
+        for _ in range(self.max_iter):
+            batch = X[rng.choice(n_rows, batch_size, replace=False)]
+            assigned = np.asarray((batch @ centers.T).argmax(axis=1)).ravel()
+
+            # Sum of the batch's rows per cluster, as a (k, n_features) array
+            membership = csr_matrix((np.ones(batch_size), (assigned, np.arange(batch_size))),
+                                    shape=(self.n_clusters, batch_size))
+            sums = (membership @ batch).toarray()
+            batch_counts = np.bincount(assigned, minlength=self.n_clusters)
+            counts += batch_counts
+
+            updated = batch_counts > 0
+            previous = centers[updated]
+            step = (sums[updated] - batch_counts[updated, None] * previous) / counts[updated, None]
+            moved = previous + step
+            norms = np.linalg.norm(moved, axis=1)
+            norms[norms == 0] = 1.0
+            centers[updated] = moved / norms[:, None]
+            if np.max(np.linalg.norm(centers[updated] - previous, axis=1)) <= self.tol:
+                break
+
+        self.cluster_centers_ = centers
+        self.counts_ = counts
+        self.labels_ = self._assign(X)
+        return self
+
+    def predict(self, X: csr_matrix) -> np.ndarray:
+        """
+        Returns the index of the most similar centroid for each row of X.
+        """
+        if self.cluster_centers_ is None:
+            raise RuntimeError("Model has not been fitted yet. Call fit() first.")
+        return self._assign(normalize_rows(X))
+
+    def _assign(self, X: csr_matrix) -> np.ndarray:
+        """
+        Labels rows in chunks so the dense similarity block stays small.
+        """
+        labels = np.empty(X.shape[0], dtype=np.int32)
+        chunk = max(1, self.batch_size * 16)
+        for start in range(0, X.shape[0], chunk):
+            similarities = X[start:start + chunk] @ self.cluster_centers_.T
+            labels[start:start + chunk] = np.asarray(similarities.argmax(axis=1)).ravel()
+        return labels
+
+    def _init_centers(self, X: csr_matrix, rng: np.random.Generator) -> np.ndarray:
+        """
+        Picks initial centroids with k-means++ seeding (on cosine distance)
+        over a random sample of rows.
+        """
+        n_rows = X.shape[0]
+        sample_size = min(n_rows, max(10 * self.n_clusters, self.batch_size))
+        sample = X[rng.choice(n_rows, sample_size, replace=False)]
+
+        chosen = [int(rng.integers(sample_size))]
+        distances = 1.0 - np.asarray(sample @ sample[chosen[0]].T.toarray()).ravel()
+        for _ in range(1, self.n_clusters):
+            weights = np.maximum(distances, 0.0) ** 2
+            total = weights.sum()
+            # All remaining rows coincide with a centroid; any row will do
+            candidate = int(rng.choice(sample_size, p=weights / total)) if total > 0 else int(rng.integers(sample_size))
+            chosen.append(candidate)
+            distances = np.minimum(distances, 1.0 - np.asarray(sample @ sample[candidate].T.toarray()).ravel())
+        return sample[chosen].toarray()
+
+
+class CentroidIndex:
+    """
+    Assigns documents to a fixed set of centroids and keeps the IDs of
+    each cluster's members, so new documents can be streamed into existing
+    clusters without refitting.
+
+    Centroids live in one contiguous float32 (n_clusters, n_features) matrix,
+    so assigning a batch is a single sparse-dense product. With the "cosine"
+    metric rows and centroids are unit vectors and the most similar centroid
+    wins; with "euclidean" the nearest one does, using
+    ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2 and dropping the constant ||x||^2.
+    """
+
+    def __init__(self, centers: np.ndarray, counts: np.ndarray, metric: str = "cosine"):
+        """
+        Args:
+            centers: The initial centroids, one per row.
+            counts: How many documents each centroid has absorbed so far; the
+                learning rate of updates decays as 1 / count.
+            metric: "cosine" or "euclidean".
+        """
+        if metric not in ("cosine", "euclidean"):
+            raise ValueError(f"Unknown metric '{metric}'. Choose from: ['cosine', 'euclidean']")
+        self.metric = metric
+        self.centers = np.ascontiguousarray(centers, dtype=np.float32)
+        self.counts = np.asarray(counts, dtype=np.int64).copy()
+        self._half_sq_norms = 0.5 * np.einsum("ij,ij->i", self.centers, self.centers)
+        self._members = [array('q') for _ in range(len(self.centers))]
+        self.num_documents = 0
+
+    def assign(self, X, chunk_size: int = 16384) -> np.ndarray:
+        """
+        Returns the cluster of each row of X, without recording anything.
+        """
+        X = self._prepare(X)
+        labels = np.empty(X.shape[0], dtype=np.int32)
+        for start in range(0, X.shape[0], chunk_size):
+            scores = np.asarray(X[start:start + chunk_size] @ self.centers.T)
+            if self.metric == "euclidean":
+                scores -= self._half_sq_norms
+            labels[start:start + chunk_size] = scores.argmax(axis=1)
+        return labels
+
+    def add(self, X, doc_ids: Optional[Sequence[int]] = None, update: bool = False) -> np.ndarray:
+        """
+        Assigns the rows of X and records them as members of their clusters.
+
+        Args:
+            X: The document vectors, one per row.
+            doc_ids: The IDs to record; defaults to consecutive IDs following
+                the documents added so far.
+            update: If True, move each centroid towards the mean of its new
+                members with a learning rate of (new members) / (all members),
+                so centroids settle as clusters grow.
+
+        Returns:
+            The cluster of each row.
+        """
+        X = self._prepare(X)
+        labels = self.assign(X)
+        if doc_ids is None:
+            doc_ids = np.arange(self.num_documents, self.num_documents + X.shape[0])
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        if len(doc_ids) != X.shape[0]:
+            raise ValueError("doc_ids must have one ID per document.")
+
+        # Group the IDs by cluster with one stable sort
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(len(self.centers) + 1))
+        for cluster, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if start < end:
+                self._members[cluster].extend(doc_ids[order[start:end]].tolist())
+        batch_counts = np.diff(bounds)
+        self.counts += batch_counts
+        self.num_documents += X.shape[0]
+
+        if update:
+            self._update(X, labels, batch_counts)
+        return labels
+
+    def members(self, cluster: int) -> np.ndarray:
+        """
+        Returns a copy of the IDs of a cluster's documents, in the order they
+        were added. (A view would pin the growable buffer, so later add()
+        calls could not extend it.)
+        """
+        return np.array(self._members[cluster], dtype=np.int64)
+
+    def _update(self, X: csr_matrix, labels: np.ndarray, batch_counts: np.ndarray) -> None:
+        membership = csr_matrix((np.ones(len(labels), dtype=np.float32), (labels, np.arange(len(labels)))),
+                                shape=(len(self.centers), len(labels)))
+        updated = batch_counts > 0
+        sums = (membership @ X)[updated].toarray()
+        previous = self.centers[updated]
+        moved = previous + (sums - batch_counts[updated, None] * previous) / self.counts[updated, None]
+        if self.metric == "cosine":
+            norms = np.linalg.norm(moved, axis=1)
+            norms[norms == 0] = 1.0
+            moved /= norms[:, None]
+        self.centers[updated] = moved
+        self._half_sq_norms[updated] = 0.5 * np.einsum("ij,ij->i", moved, moved)
+
+    def _prepare(self, X) -> csr_matrix:
+        """
+        Converts X to float32 CSR (unit rows for "cosine"), so the product
+        with the float32 centroids needs no upcast copy of them.
+        """
+        if self.metric == "cosine":
+            X = normalize_rows(X)
+        elif not issparse(X):
+            X = csr_matrix(np.asarray(X))
+        return X if X.dtype == np.float32 else X.astype(np.float32)
+
+
+def normalize_rows(X) -> csr_matrix:
+    """
+    Returns X as a float CSR matrix with unit L2-norm rows (all-zero rows stay zero).
+    """
+    if issparse(X):
+        X = csr_matrix(X) if X.dtype in (np.float32, np.float64) else csr_matrix(X, dtype=np.float64)
+    else:
+        X = csr_matrix(np.asarray(X, dtype=np.float64))
+    norms = csr_row_norms(X)
+    if np.allclose(norms[norms > 0], 1.0):
+        return X
+    return l2_normalize_rows(X, norms)
+
 
 class TextClusterer:
     """
     A class to perform K-Means clustering on text documents.
     """
 
-    def __init__(self, vectorizer: Vectorizer, num_clusters: int = 3):
+    def __init__(self, vectorizer: Vectorizer, num_clusters: int = 3, algorithm: str = "kmeans",
+                 batch_size: int = 1024, max_iter: int = 100):
         """
         Initializes the TextClusterer.
 
         Args:
             vectorizer: A Vectorizer instance to convert texts to numerical features.
             num_clusters: The number of clusters to form.
+            algorithm: "kmeans" for scikit-learn's full-batch KMeans, or
+                "spherical_minibatch" for SphericalMiniBatchKMeans, which
+                clusters sparse rows by cosine similarity in mini-batches and
+                suits large corpora (use a vectorizer with sparse=True).
+            batch_size: Rows per update step of "spherical_minibatch".
+            max_iter: The maximum number of update steps of "spherical_minibatch".
         """
+        if algorithm not in CLUSTERING_ALGORITHMS:
+            raise ValueError(f"Unknown algorithm '{algorithm}'. Choose from: {list(CLUSTERING_ALGORITHMS)}")
         self._vectorizer = vectorizer
         self._num_clusters = num_clusters
+        self._algorithm = algorithm
+        self._batch_size = batch_size
+        self._max_iter = max_iter
         self._kmeans_model = None
         self._labels = None
+        self._index: Optional[CentroidIndex] = None
+        # The document matrix from fit(), reused by calculate_silhouette_score
+        self._X = None
 
     def fit(self, texts: List[str]) -> None:
         """
@@ -33,14 +292,28 @@ class TextClusterer:
         # Vectorize the texts
         X = self._vectorizer.fit_transform(texts)
         
-        # Initialize and train KMeans
-        self._kmeans_model = KMeans(n_clusters=self._num_clusters, random_state=42, n_init='auto')
+        if self._algorithm == "spherical_minibatch":
+            X = normalize_rows(X)
+            self._kmeans_model = SphericalMiniBatchKMeans(
+                self._num_clusters, batch_size=self._batch_size, max_iter=self._max_iter
+            )
+        else:
+            # Initialize and train KMeans
+            self._kmeans_model = KMeans(n_clusters=self._num_clusters, random_state=42, n_init='auto')
         self._kmeans_model.fit(X)
         self._labels = self._kmeans_model.labels_
+        self._X = X
+
+        # The fitted documents become members 0..n-1 of the centroid index
+        metric = "cosine" if self._algorithm == "spherical_minibatch" else "euclidean"
+        self._index = CentroidIndex(self._kmeans_model.cluster_centers_,
+                                    np.zeros(self._num_clusters, dtype=np.int64), metric)
+        self._index.add(X)
 
     def predict(self, texts: List[str]) -> List[int]:
         """
-        Predicts cluster labels for the given texts.
+        Predicts cluster labels for the given texts, without adding them to
+        the clusters (see assign()).
 
         Args:
             texts: A list of text documents.
@@ -52,14 +325,50 @@ class TextClusterer:
             raise RuntimeError("Clusterer has not been fitted yet. Call fit() first.")
         
         X = self._vectorizer.transform(texts)
-        return self._kmeans_model.predict(X).tolist()
+        return self._index.assign(X).tolist()
+
+    def assign(self, texts: List[str], doc_ids: Optional[Sequence[int]] = None,
+               update: bool = False) -> List[int]:
+        """
+        Streams new documents into the existing clusters without refitting.
+
+        The documents are vectorized with the fitted vectorizer, assigned with
+        one sparse-dense product against the centroids and recorded as cluster
+        members.
+
+        Args:
+            texts: The new documents.
+            doc_ids: Their IDs; by default they continue after the documents
+                seen so far (the fitted ones are 0..n-1).
+            update: If True, also move the centroids towards the new members,
+                with a learning rate that decays as clusters grow.
+
+        Returns:
+            The cluster label of each document.
+        """
+        if self._index is None:
+            raise RuntimeError("Clusterer has not been fitted yet. Call fit() first.")
+
+        X = self._vectorizer.transform(texts)
+        return self._index.add(X, doc_ids=doc_ids, update=update).tolist()
+
+    def get_cluster_members(self) -> Dict[int, np.ndarray]:
+        """
+        Returns the document IDs in each cluster, including documents added
+        with assign().
+        """
+        if self._index is None:
+            raise RuntimeError("Clusterer has not been fitted yet. Call fit() first.")
+        return {cluster: self._index.members(cluster) for cluster in range(self._num_clusters)}
 
     def get_cluster_info(self, texts: List[str]) -> Dict[int, List[str]]:
         """
         Organizes the original texts into clusters.
 
         Args:
-            texts: The original list of text documents used for fitting.
+            texts: The documents indexed by document ID: the original list of
+                text documents used for fitting, optionally followed by the
+                documents added with assign().
 
         Returns:
             A dictionary mapping cluster ID to a list of documents in that cluster.
@@ -67,23 +376,39 @@ class TextClusterer:
         if self._labels is None:
             raise RuntimeError("Clusterer has not been fitted yet. Call fit() first.")
         
-        clusters = defaultdict(list)
-        for i, text in enumerate(texts):
-            clusters[self._labels[i]].append(text)
-        return dict(clusters)
+        clusters = {}
+        for cluster, doc_ids in self.get_cluster_members().items():
+            doc_ids = doc_ids[doc_ids < len(texts)].tolist()
+            if doc_ids:
+                clusters[cluster] = [texts[i] for i in doc_ids]
+        return clusters
 
-    def calculate_silhouette_score(self, texts: List[str]) -> float:
+    def calculate_silhouette_score(self, texts: Optional[List[str]] = None,
+                                   sample_size: Optional[int] = 10000,
+                                   random_state: Optional[int] = 42) -> float:
         """
         Calculates the Silhouette Score for the clustering.
 
+        The score is computed on the matrix built by fit(), so the texts are
+        not vectorized again. Exact silhouette needs all pairwise distances,
+        so by default it is estimated on a random sample of documents.
+
         Args:
-            texts: The original list of text documents used for fitting.
+            texts: Unused; the documents used for fitting are scored. Kept
+                for backward compatibility.
+            sample_size: How many documents to estimate the score on, or None
+                to use all of them (quadratic in the number of documents).
+            random_state: Seed for drawing the sample.
 
         Returns:
-            The Silhouette Score.
+            The Silhouette Score, with cosine distance for "spherical_minibatch"
+            and Euclidean distance for "kmeans".
         """
         if self._kmeans_model is None or self._labels is None:
             raise RuntimeError("Clusterer has not been fitted yet. Call fit() first.")
         
-        X = self._vectorizer.transform(texts)
-        return silhouette_score(X, self._labels)
+        metric = "cosine" if self._algorithm == "spherical_minibatch" else "euclidean"
+        if sample_size is not None and sample_size >= len(self._labels):
+            sample_size = None
+        return silhouette_score(self._X, self._labels, metric=metric,
+                                sample_size=sample_size, random_state=random_state)
@@ -0,0 +1,107 @@
+import sys
+import os
+import random
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.preprocessing.regex_tokenizer import RegexTokenizer
+from src.representations.tfidf_vectorizer import TfidfVectorizer
+from src.tasks.text_clustering import SphericalMiniBatchKMeans, TextClusterer
+
+TOPICS = {
+    "pets": "cat dog kitten puppy fur paw leash collar",
+    "space": "rocket orbit planet moon astronaut launch galaxy star",
+    "food": "bread cheese soup salad pasta recipe oven spice",
+}
+
+
+def make_corpus(docs_per_topic=60, words_per_doc=30, seed=0):
+    """
+    Builds documents drawn from disjoint topic vocabularies, so the true
+    clustering is known.
+    """
+    rng = random.Random(seed)
+    texts, topics = [], []
+    for topic, words in TOPICS.items():
+        words = words.split()
+        for _ in range(docs_per_topic):
+            texts.append(" ".join(rng.choice(words) for _ in range(words_per_doc)))
+            topics.append(topic)
+    return texts, topics
+
+
+def check_recovers_topics(labels, topics, label):
+    """
+    Asserts that every topic forms exactly one cluster.
+    """
+    mapping = {}
+    for cluster, topic in zip(labels.tolist(), topics):
+        assert mapping.setdefault(topic, cluster) == cluster, f"{label}: topic '{topic}' was split"
+    assert len(set(mapping.values())) == len(TOPICS), f"{label}: topics were merged"
+    print(f"{label}: each topic forms one cluster.")
+
+
+def main():
+    """
+    Checks the sparse mini-batch clustering engine on a corpus with known topics.
+    """
+    print("--- Spherical Mini-Batch K-Means ---")
+    texts, topics = make_corpus()
+    X = TfidfVectorizer(RegexTokenizer(), sparse=True).fit_transform(texts)
+
+    # 1. Mini-batches smaller than the corpus still recover the topics
+    model = SphericalMiniBatchKMeans(n_clusters=len(TOPICS), batch_size=32, max_iter=50)
+    model.fit(X)
+    check_recovers_topics(model.labels_, topics, "sparse input")
+    assert np.allclose(np.linalg.norm(model.cluster_centers_, axis=1), 1.0)
+    assert model.counts_.sum() > 0
+    print("Centroids are unit vectors.")
+
+    # 2. predict() on the fitted rows reproduces labels_
+    assert np.array_equal(model.predict(X), model.labels_)
+    print("predict() on the training rows equals labels_.")
+
+    # 3. Dense input gives the same model as sparse input
+    dense_model = SphericalMiniBatchKMeans(n_clusters=len(TOPICS), batch_size=32, max_iter=50)
+    dense_model.fit(X.toarray())
+    assert np.array_equal(dense_model.labels_, model.labels_)
+    assert np.allclose(dense_model.cluster_centers_, model.cluster_centers_)
+    print("Dense and sparse input give the same clustering.")
+
+    # 4. The centroid index behind TextClusterer reproduces the fitted labels
+    new_texts, new_topics = make_corpus(docs_per_topic=5, seed=1)
+    for algorithm in ("kmeans", "spherical_minibatch"):
+        vectorizer = TfidfVectorizer(RegexTokenizer(), sparse=True)
+        clusterer = TextClusterer(vectorizer, num_clusters=len(TOPICS), algorithm=algorithm, batch_size=32)
+        clusterer.fit(texts)
+        # The same model, fitted directly on the same matrix
+        if algorithm == "kmeans":
+            reference = KMeans(n_clusters=len(TOPICS), random_state=42, n_init='auto').fit(X)
+        else:
+            reference = SphericalMiniBatchKMeans(n_clusters=len(TOPICS), batch_size=32).fit(X)
+        assert clusterer.predict(texts) == reference.labels_.tolist()
+        print(f"{algorithm}: predict() on the fitted texts equals labels_.")
+
+        # predict() leaves the clusters alone; assign() streams documents into them
+        predicted = clusterer.predict(new_texts)
+        assert sum(len(ids) for ids in clusterer.get_cluster_members().values()) == len(texts)
+        assigned = clusterer.assign(new_texts)
+        assert assigned == predicted
+        check_recovers_topics(np.array(assigned), new_topics, f"{algorithm}, streamed documents")
+        members = clusterer.get_cluster_members()
+        new_ids = range(len(texts), len(texts) + len(new_texts))
+        for doc_id, cluster in zip(new_ids, assigned):
+            assert doc_id in members[cluster]
+
+        # Members are copies, so callers cannot corrupt the index
+        members[0][:] = -1
+        assert (clusterer.get_cluster_members()[0] >= 0).all()
+    print("assign() records new members under the predicted clusters.")
+
+
+if __name__ == "__main__":
+    main()
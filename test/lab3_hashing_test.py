@@ -0,0 +1,66 @@
+import sys
+import os
+
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.preprocessing.regex_tokenizer import RegexTokenizer
+from src.representations.hashing_vectorizer import HashingVectorizer
+
+CORPUS = [
+    "the cat sat on the mat",
+    "the dog sat on the log",
+    "cats and dogs are friends",
+    "a bird sang in the tree",
+    "the bird and the cat watched the dog",
+    "dogs chase cats and cats chase birds",
+]
+
+
+def main():
+    """
+    Main function to test the HashingVectorizer.
+    """
+    print("--- HashingVectorizer Evaluation ---")
+    tokenizer = RegexTokenizer()
+
+    # 1. Hashed counts need no fitting and have a fixed width
+    vectorizer = HashingVectorizer(tokenizer, n_features=16)
+    counts = vectorizer.transform(CORPUS)
+    print(f"\nHashed count matrix: shape {counts.shape}, {counts.nnz} nonzeros")
+    assert counts.shape == (len(CORPUS), 16)
+
+    # Without signs, each row sums to the number of tokens in the document
+    unsigned = HashingVectorizer(tokenizer, n_features=16, alternate_sign=False).transform(CORPUS)
+    token_counts = [len(tokenizer.tokenize(document)) for document in CORPUS]
+    assert np.array_equal(np.asarray(unsigned.sum(axis=1)).ravel(), token_counts)
+    print("Unsigned rows sum to the document lengths.")
+
+    # 2. Dense output holds the same values as sparse output
+    dense = HashingVectorizer(tokenizer, n_features=16, sparse=False).transform(CORPUS)
+    assert np.array_equal(np.array(dense), counts.toarray())
+    print("Dense and sparse output agree.")
+
+    # 3. Transforming in worker processes gives the serial result
+    parallel = HashingVectorizer(tokenizer, n_features=16, n_jobs=2).transform(CORPUS)
+    assert np.array_equal(parallel.toarray(), counts.toarray())
+    print("n_jobs=2 agrees with the serial transform.")
+
+    # 4. IDF weights from fit() and from streamed partial_fit() batches agree
+    fitted = HashingVectorizer(tokenizer, n_features=16, use_idf=True)
+    fitted.fit(CORPUS)
+    streamed = HashingVectorizer(tokenizer, n_features=16, use_idf=True)
+    for start in range(0, len(CORPUS), 2):
+        streamed.partial_fit(CORPUS[start:start + 2])
+    assert np.allclose(fitted.idf_, streamed.idf_)
+    tfidf = fitted.transform(CORPUS)
+    assert np.allclose(tfidf.toarray(), streamed.transform(CORPUS).toarray())
+    row_norms = np.linalg.norm(tfidf.toarray(), axis=1)
+    assert np.allclose(row_norms[row_norms > 0], 1.0)
+    print("fit() and partial_fit() give the same L2-normalized TF-IDF vectors.")
+
+
+if __name__ == "__main__":
+    main()
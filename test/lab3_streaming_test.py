@@ -0,0 +1,69 @@
+import sys
+import os
+
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.preprocessing.regex_tokenizer import RegexTokenizer
+from src.representations.count_vectorizer import CountVectorizer
+from src.representations.tfidf_vectorizer import TfidfVectorizer
+
+CORPUS = [
+    "the cat sat on the mat",
+    "the dog sat on the log",
+    "cats and dogs are friends",
+    "a bird sang in the tree",
+    "the bird and the cat watched the dog",
+    "dogs chase cats and cats chase birds",
+    "",
+]
+
+
+def stream_batches(corpus, batch_size):
+    """
+    Yields the corpus in small batches, as if read from a large file.
+    """
+    for start in range(0, len(corpus), batch_size):
+        yield (document for document in corpus[start:start + batch_size])
+
+
+def main():
+    """
+    Checks that streamed fitting and sparse output match the in-memory,
+    dense vectorizers.
+    """
+    print("--- Streaming and Sparse Vectorizers ---")
+    tokenizer = RegexTokenizer()
+
+    for vectorizer_class in (CountVectorizer, TfidfVectorizer):
+        name = vectorizer_class.__name__
+        fitted = vectorizer_class(tokenizer)
+        dense = np.array(fitted.fit_transform(CORPUS))
+
+        # 1. Sparse output holds the same values as dense output
+        sparse = vectorizer_class(tokenizer, sparse=True).fit_transform(CORPUS)
+        assert np.allclose(sparse.toarray(), dense)
+        print(f"{name}: sparse and dense output agree.")
+
+        # 2. partial_fit over streamed batches learns what fit() learns
+        streamed = vectorizer_class(tokenizer, sparse=True)
+        for batch in stream_batches(CORPUS, 2):
+            streamed.partial_fit(batch)
+        assert streamed.vocabulary_ == fitted.vocabulary_
+        if vectorizer_class is TfidfVectorizer:
+            assert np.allclose(streamed.idf_, fitted.idf_)
+        assert np.allclose(streamed.transform(CORPUS).toarray(), dense)
+        print(f"{name}: partial_fit() over batches agrees with fit().")
+
+        # 3. fit() starts over instead of extending the vocabulary
+        refitted = vectorizer_class(tokenizer)
+        refitted.fit(["an unrelated corpus"])
+        refitted.fit(CORPUS)
+        assert refitted.vocabulary_ == fitted.vocabulary_
+        print(f"{name}: fit() resets what earlier fits learned.")
+
+
+if __name__ == "__main__":
+    main()
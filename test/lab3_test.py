@@ -39,7 +39,7 @@ def main():
     # 6. Print the learned IDF values
     print("\nLearned IDF Values:")
     # Round for readability
-    readable_idf = {k: round(v, 3) for k, v in vectorizer.idf_.items()}
+    readable_idf = {token: round(float(vectorizer.idf_[i]), 3) for token, i in vectorizer.vocabulary_.items()}
     pprint.pprint(readable_idf)
 
     # 7. Print the resulting TF-IDF Matrix
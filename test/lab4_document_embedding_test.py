@@ -0,0 +1,88 @@
+import sys
+import os
+import math
+import tempfile
+
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.vocabulary import Vocabulary
+from src.preprocessing.regex_tokenizer import RegexTokenizer
+from src.representations.embedding_store import EmbeddingStore
+from src.representations.word_embedder import WordEmbedder
+
+WORDS = ["the", "cat", "dog", "sat", "on", "mat", "log", "ran", "fast", "slow"]
+CORPUS = [
+    "the cat sat on the mat",
+    "the dog sat on the log",
+    "the dog ran fast",
+    "the cat ran slow",
+]
+DOCUMENTS = CORPUS + [
+    "a cat and a dog",         # Partly out of vocabulary
+    "nothing known here",      # Entirely out of vocabulary
+    "",
+]
+
+
+def weighted_mean(embedder, tokenizer, document, weight):
+    """
+    Embeds one document as the weighted mean of its in-vocabulary word vectors.
+    """
+    tokens = [token for token in tokenizer.tokenize(document) if token in embedder.model.key_to_index]
+    if not tokens:
+        return np.zeros(embedder.vector_size)
+    weights = np.array([weight(token) for token in tokens])
+    vectors = np.array([embedder.get_vector(token) for token in tokens])
+    return weights @ vectors / weights.sum()
+
+
+def main():
+    """
+    Checks WordEmbedder.embed_documents against embedding documents one at a time.
+    """
+    print("--- Batch Document Embedding ---")
+    tokenizer = RegexTokenizer()
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        # A small local store, so no model has to be downloaded
+        EmbeddingStore(rng.standard_normal((len(WORDS), 8)).astype(np.float32), Vocabulary(WORDS)).save(store_dir)
+        embedder = WordEmbedder(path=store_dir)
+
+        # 1. Unweighted batches equal the per-document means
+        batch = embedder.embed_documents(DOCUMENTS, tokenizer)
+        assert batch.shape == (len(DOCUMENTS), embedder.vector_size)
+        for document, embedding in zip(DOCUMENTS, batch):
+            assert np.allclose(embedding, embedder.embed_document(document, tokenizer), atol=1e-6)
+        assert not batch[-2:].any()
+        print("embed_documents() equals embed_document() on every document.")
+
+        # 2. Weighted means use frequencies from the fitted vocabulary
+        vocabulary = Vocabulary()
+        tokenizer.encode(CORPUS, vocabulary, add=True)
+        total = sum(vocabulary.counts)
+
+        def frequency(counts, token):
+            token_id = vocabulary.get(token)
+            return 0 if token_id is None else counts[token_id]
+
+        weights = {
+            "tfidf": lambda token: math.log(vocabulary.num_docs / (frequency(vocabulary.doc_counts, token) + 1)) + 1,
+            "sif": lambda token: 1e-3 / (1e-3 + frequency(vocabulary.counts, token) / total),
+        }
+        for weighting, weight in weights.items():
+            weighted = embedder.embed_documents(DOCUMENTS, tokenizer, weighting=weighting, vocabulary=vocabulary)
+            for document, embedding in zip(DOCUMENTS, weighted):
+                assert np.allclose(embedding, weighted_mean(embedder, tokenizer, document, weight), atol=1e-5)
+
+            # A document's embedding does not depend on the rest of its batch
+            alone = embedder.embed_documents(DOCUMENTS[:1], tokenizer, weighting=weighting, vocabulary=vocabulary)
+            assert np.array_equal(alone[0], weighted[0])
+            print(f"'{weighting}' weighting matches the per-document weighted mean.")
+
+
+if __name__ == "__main__":
+    main()
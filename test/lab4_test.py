@@ -8,6 +8,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from src.preprocessing.regex_tokenizer import RegexTokenizer
 from src.representations.word_embedder import WordEmbedder
+from src.representations.ann_index import ExactIndex, benchmark_recall
 
 def main():
     """
@@ -48,6 +49,17 @@ def main():
         print(f"Original document: '{doc}'")
         print(f"Document vector (first 5 dims): {doc_vector[:5]}")
 
+        # 6. Approximate nearest neighbors
+        print("\n--- Approximate Most Similar (IVF index) ---")
+        index = embedder.build_index(n_probe=8)
+        print("Most similar to 'computer' (approximate):")
+        pprint.pprint(embedder.get_most_similar('computer'))
+        query_rows = np.arange(0, len(embedder.model.vectors), len(embedder.model.vectors) // 500)
+        results = benchmark_recall(index, ExactIndex(embedder.model.vectors),
+                                   embedder.model.vectors[query_rows], k=10, exclude=query_rows)
+        print(f"recall@10: {results['recall']:.3f}, "
+              f"{results['index_ms_per_query']:.3f} ms/query vs {results['exact_ms_per_query']:.3f} ms/query exact")
+
     except Exception as e:
         print(f"\nAn error occurred: {e}")
         print("This might be due to a network issue while downloading the model.")
@@ -0,0 +1,109 @@
+import sys
+import os
+import random
+import tempfile
+
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.preprocessing.regex_tokenizer import RegexTokenizer
+from src.representations.hashing_vectorizer import HashingVectorizer
+from src.representations.tfidf_vectorizer import TfidfVectorizer
+from src.models.text_classifier import TextClassifier
+from src.pipelines.text_pipeline import TextPipeline
+
+TOPICS = [
+    "match goal team score coach league player win",           # 0: sports
+    "laptop software chip code server network cloud app",      # 1: technology
+    "recipe bake flavor dinner spicy kitchen sauce dessert",   # 2: food
+]
+
+
+def make_dataset(docs_per_topic=40, seed=0):
+    """
+    Builds shuffled documents drawn from one topic vocabulary each.
+    """
+    rng = random.Random(seed)
+    data = []
+    for label, words in enumerate(TOPICS):
+        words = words.split()
+        for _ in range(docs_per_topic):
+            data.append((" ".join(rng.choice(words) for _ in range(6)), label))
+    rng.shuffle(data)
+    texts, labels = zip(*data)
+    return list(texts), list(labels)
+
+
+def batches(texts, labels, size):
+    for start in range(0, len(texts), size):
+        yield texts[start:start + size], labels[start:start + size]
+
+
+def accuracy(classifier, texts, labels):
+    return float(np.mean(np.array(classifier.predict(texts)) == np.array(labels)))
+
+
+def main():
+    """
+    Checks incremental training of TextClassifier: mini-batches, streams and
+    warm starts, including after a pipeline is saved and loaded.
+    """
+    print("--- Incremental TextClassifier Training ---")
+    texts, labels = make_dataset()
+    tokenizer = RegexTokenizer()
+    classes = [0, 1, 2]
+
+    # 1. partial_fit over mini-batches with a stateless vectorizer
+    streamed = TextClassifier(HashingVectorizer(tokenizer, n_features=256), classifier="sgd")
+    for batch_texts, batch_labels in batches(texts, labels, 16):
+        streamed.partial_fit(batch_texts, batch_labels, classes=classes)
+    print(f"partial_fit over mini-batches: accuracy {accuracy(streamed, texts, labels):.2f}")
+    assert accuracy(streamed, texts, labels) >= 0.9
+
+    # 2. fit_batches() is the same as calling partial_fit() per batch
+    from_stream = TextClassifier(HashingVectorizer(tokenizer, n_features=256), classifier="sgd")
+    from_stream.fit_batches(batches(texts, labels, 16), classes=classes)
+    assert np.array_equal(from_stream.get_state()["coef"], streamed.get_state()["coef"])
+    print("fit_batches() matches per-batch partial_fit().")
+
+    # 3. Warm starts accept batches holding only some of the classes
+    vectorizer = TfidfVectorizer(tokenizer, sparse=True)
+    classifier = TextClassifier(vectorizer, classifier="sgd")
+    classifier.fit(texts, labels)
+    new_texts, new_labels = make_dataset(docs_per_topic=10, seed=1)
+    steps = classifier.get_state()["t"]
+    missing_class = [(text, label) for text, label in zip(new_texts, new_labels) if label != 2]
+    classifier.fit([text for text, _ in missing_class], [label for _, label in missing_class], warm_start=True)
+    only_class = [text for text, label in zip(new_texts, new_labels) if label == 1]
+    classifier.fit(only_class, [1] * len(only_class), warm_start=True, warm_start_epochs=2)
+    assert classifier.get_state()["t"] > steps
+    assert list(classifier.get_state()["classes"]) == classes
+    assert accuracy(classifier, new_texts, new_labels) >= 0.9
+    print(f"Warm starts on partial batches: accuracy {accuracy(classifier, new_texts, new_labels):.2f}")
+
+    for bad_call in (lambda: classifier.fit(new_texts[:2], [0, 3], warm_start=True),
+                     lambda: TextClassifier(vectorizer).fit(texts, labels, warm_start=True)):
+        try:
+            bad_call()
+        except ValueError as error:
+            print(f"Rejected: {error}")
+        else:
+            raise AssertionError("expected a ValueError")
+
+    # 4. A loaded pipeline keeps training from its saved weights
+    pipeline = TextPipeline(tokenizer, vectorizer, classifier)
+    with tempfile.TemporaryDirectory() as save_dir:
+        pipeline.save(save_dir)
+        loaded = TextPipeline.load(save_dir)
+        assert loaded.process_batch(new_texts) == pipeline.process_batch(new_texts)
+        loaded_classifier = loaded._classifier
+        loaded_classifier.fit(only_class, [1] * len(only_class), warm_start=True)
+        classifier.fit(only_class, [1] * len(only_class), warm_start=True)
+        assert np.allclose(loaded_classifier.get_state()["coef"], classifier.get_state()["coef"])
+    print("Warm start after TextPipeline.load() continues exactly like the original.")
+
+
+if __name__ == "__main__":
+    main()
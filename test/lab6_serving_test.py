@@ -0,0 +1,171 @@
+import sys
+import os
+import asyncio
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.preprocessing.regex_tokenizer import RegexTokenizer
+from src.representations.tfidf_vectorizer import TfidfVectorizer
+from src.models.text_classifier import TextClassifier
+from src.pipelines.async_text_pipeline import AsyncTextPipeline
+from src.pipelines.prediction_cache import PredictionCache
+from src.pipelines.text_pipeline import TextPipeline
+
+TEXTS = [
+    "This movie is fantastic and I love it!",
+    "I hate this film, it's terrible.",
+    "The acting was superb, a truly great experience.",
+    "What a waste of time, absolutely boring.",
+    "Highly recommend this, a masterpiece.",
+    "Could not finish watching, so bad.",
+]
+LABELS = [1, 0, 1, 0, 1, 0] # 1 for positive, 0 for negative
+
+
+class FakeClock:
+    """
+    A clock for the cache's ttl that only moves when told to.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def build_pipeline(cache=None):
+    tokenizer = RegexTokenizer()
+    vectorizer = TfidfVectorizer(tokenizer=tokenizer)
+    classifier = TextClassifier(vectorizer=vectorizer)
+    classifier.fit(TEXTS, LABELS)
+    return TextPipeline(tokenizer=tokenizer, vectorizer=vectorizer, classifier=classifier, cache=cache)
+
+
+def check_prediction_cache():
+    print("\n--- PredictionCache ---")
+    uncached = build_pipeline()
+    expected = uncached.process_batch(TEXTS)
+
+    clock = FakeClock()
+    cache = PredictionCache(max_size=100, ttl=60.0, clock=clock)
+    pipeline = build_pipeline(cache=cache)
+
+    # 1. The first batch misses, repeating it (with other spacing) hits
+    assert pipeline.process_batch(TEXTS) == expected
+    assert (cache.hits, cache.misses) == (0, len(TEXTS))
+    respaced = ["  " + "   ".join(text.split()) + " " for text in TEXTS]
+    assert pipeline.process_batch(respaced) == expected
+    assert [pipeline.process(text) for text in TEXTS] == expected
+    assert (cache.hits, cache.misses) == (2 * len(TEXTS), len(TEXTS))
+    print(f"Repeated texts are served from the cache: {cache.stats()}")
+
+    # 2. Entries expire after ttl seconds
+    clock.now += 61.0
+    assert pipeline.process(TEXTS[0]) == expected[0]
+    assert cache.misses == len(TEXTS) + 1
+    print("Expired entries count as misses and are predicted again.")
+
+    # 3. Least recently used entries are evicted beyond max_size
+    small = PredictionCache(max_size=2)
+    small.put("a", 1)
+    small.put("b", 2)
+    small.get("a")
+    small.put("c", 3)
+    assert len(small) == 2 and small.get("b") is None and small.get("a") == 1
+    print("The least recently used entry is evicted first.")
+
+
+class FailingPipeline(TextPipeline):
+    """
+    A pipeline whose batches always fail, to check error propagation.
+    """
+
+    def __init__(self):
+        pass
+
+    def process_batch(self, texts):
+        raise ValueError("model unavailable")
+
+
+class SlowPipeline(TextPipeline):
+    """
+    Wraps a pipeline so every batch takes a while, to race requests with close().
+    """
+
+    def __init__(self, pipeline, delay=0.2):
+        self._inner = pipeline
+        self._delay = delay
+
+    def process_batch(self, texts):
+        time.sleep(self._delay)
+        return self._inner.process_batch(texts)
+
+
+async def check_async_pipeline():
+    print("\n--- AsyncTextPipeline ---")
+    pipeline = build_pipeline()
+    requests = TEXTS * 4
+    expected = pipeline.process_batch(requests)
+
+    # 1. Concurrent requests are coalesced into a few batches
+    server = AsyncTextPipeline(pipeline, max_batch_size=8, max_wait_ms=50.0)
+    async with server:
+        results = await asyncio.gather(*(server.process(text) for text in requests))
+        assert list(results) == list(expected)
+        assert server.num_requests == len(requests)
+        assert server.num_batches == -(-len(requests) // 8)
+        print(f"{server.num_requests} concurrent requests served in {server.num_batches} batches.")
+
+        assert await server.process_batch(TEXTS) == list(expected[:len(TEXTS)])
+    print("process_batch() answers every text in order.")
+
+    # 2. close() answers the requests queued before it, then stops the worker
+    pending = [asyncio.ensure_future(server.process(text)) for text in TEXTS]
+    await asyncio.sleep(0)
+    await server.close()
+    assert [future.result() for future in pending] == list(expected[:len(TEXTS)])
+    assert server._worker is None
+    print("close() serves the queued requests before stopping.")
+
+    # 3. Requests made while close() is serving the queue are rejected, not lost
+    slow_server = AsyncTextPipeline(SlowPipeline(pipeline), max_batch_size=2, max_wait_ms=1.0)
+    queued = [asyncio.ensure_future(slow_server.process(text)) for text in TEXTS]
+    await asyncio.sleep(0.05)
+    closing = asyncio.ensure_future(slow_server.close())
+    for _ in range(3):
+        await asyncio.sleep(0.15)
+        try:
+            await asyncio.wait_for(slow_server.process(TEXTS[0]), timeout=5.0)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("process() during close() should be rejected")
+    await asyncio.wait_for(closing, timeout=5.0)
+    assert [future.result() for future in queued] == list(expected[:len(TEXTS)])
+    # Once closed, the server starts a new worker on demand
+    assert await asyncio.wait_for(slow_server.process(TEXTS[1]), timeout=5.0) == expected[1]
+    await slow_server.close()
+    print("Requests during close() are rejected; queued ones are all answered.")
+
+    # 4. A failing batch raises in every caller of that batch
+    async with AsyncTextPipeline(FailingPipeline(), max_batch_size=4) as failing:
+        outcomes = await asyncio.gather(*(failing.process(text) for text in TEXTS[:4]),
+                                        return_exceptions=True)
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    print(f"Batch errors reach every caller: {outcomes[0]!r}")
+
+
+def main():
+    """
+    Checks the serving helpers around TextPipeline.
+    """
+    print("--- TextPipeline Serving ---")
+    check_prediction_cache()
+    asyncio.run(check_async_pipeline())
+
+
+if __name__ == "__main__":
+    main()
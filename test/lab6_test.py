@@ -1,6 +1,7 @@
 import sys
 import os
 import pprint
+import tempfile
 from sklearn.model_selection import train_test_split
 
 # Add the project root to the Python path
@@ -62,6 +63,13 @@ def main():
     print("\nEvaluation Metrics for Batch Predictions:")
     pprint.pprint(metrics)
 
+    # 9. Save the fitted pipeline and load it back without refitting
+    with tempfile.TemporaryDirectory() as save_dir:
+        pipeline.save(save_dir)
+        loaded_pipeline = TextPipeline.load(save_dir)
+        loaded_prediction = loaded_pipeline.process(single_sentence)
+    print(f"\nLoaded pipeline: '{single_sentence}' -> Predicted: {loaded_prediction}")
+
 
 if __name__ == "__main__":
     main()
@@ -51,11 +51,9 @@ def main():
     # 6. Demonstrate prediction
     print("\n--- Demonstrating Next Word Prediction ---")
     context = ['the']
-    predictions = lm.predict_next_word(context)
     print(f"Top 5 most likely words to follow '{' '.join(context)}':")
-    # Sort the predictions by probability in descending order and print the top 5
-    sorted_predictions = sorted(predictions.items(), key=lambda item: item[1], reverse=True)
-    pprint.pprint(sorted_predictions[:5])
+    # Read the top 5 off the model's ranking instead of sorting the full distribution
+    pprint.pprint(lm.top_k_next_words(context, k=5))
 
     # 7. Demonstrate text generation
     print("\n--- Demonstrating Text Generation ---")
@@ -0,0 +1,123 @@
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+# Add the project root to the Python path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.preprocessing.regex_tokenizer import RegexTokenizer
+from src.models.ngram_language_model import NgramLanguageModel
+
+CORPUS = [
+    "The quick brown fox jumps over the lazy dog.",
+    "The dog barks loudly.",
+    "A quick fox is a clever fox.",
+    "The lazy dog sleeps while the quick fox runs.",
+    "A clever dog and a lazy fox.",
+] * 20
+
+
+def all_contexts(tokenizer, n):
+    """
+    Returns every (n-1)-word context of the corpus, plus one unseen context.
+    """
+    contexts = {("unseen",) * (n - 1)}
+    for document in CORPUS:
+        tokens = ["<s>"] * (n - 1) + tokenizer.tokenize(document)
+        for i in range(len(tokens) - n + 2):
+            contexts.add(tuple(tokens[i:i + n - 1]))
+    return sorted(contexts)
+
+
+def check_same_predictions(expected, actual, contexts, label):
+    for context in contexts:
+        distribution = expected.predict_next_word(list(context))
+        assert actual.predict_next_word(list(context)) == distribution, \
+            f"{label}: distributions differ for context {context}"
+        # Engines may break ties between equally frequent words differently
+        expected_top = expected.top_k_next_words(list(context), k=3)
+        actual_top = actual.top_k_next_words(list(context), k=3)
+        assert [p for _, p in actual_top] == [p for _, p in expected_top], \
+            f"{label}: top-k differs for context {context}"
+        assert all(distribution[word] == p for word, p in actual_top), \
+            f"{label}: top-k disagrees with the distribution for context {context}"
+    print(f"{label}: identical on {len(contexts)} contexts.")
+
+
+def predictions_in_fresh_process(path, contexts):
+    """
+    Loads a saved model in a new Python process and returns its next-word
+    distributions, so nothing is shared with this process but the file.
+    """
+    script = (
+        "import json, sys\n"
+        f"sys.path.insert(0, {PROJECT_ROOT!r})\n"
+        "from src.preprocessing.regex_tokenizer import RegexTokenizer\n"
+        "from src.models.ngram_language_model import NgramLanguageModel\n"
+        f"lm = NgramLanguageModel.load({path!r}, RegexTokenizer())\n"
+        "contexts = json.load(sys.stdin)\n"
+        "print(json.dumps([lm.predict_next_word(context) for context in contexts]))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], input=json.dumps(contexts),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def main():
+    """
+    Checks that every N-gram storage engine gives the same model.
+    """
+    print("--- NgramLanguageModel Storage Engines ---")
+    tokenizer = RegexTokenizer()
+
+    for n in (2, 3):
+        print(f"\nn = {n}")
+        contexts = all_contexts(tokenizer, n)
+
+        dict_lm = NgramLanguageModel(tokenizer=tokenizer, n=n, storage="dict")
+        dict_lm.fit(CORPUS)
+        array_lm = NgramLanguageModel(tokenizer=tokenizer, n=n, storage="array")
+        array_lm.fit(CORPUS)
+        check_same_predictions(dict_lm, array_lm, contexts, "dict vs array")
+
+        # Fitting in two calls merges the counts into the existing arrays
+        split_lm = NgramLanguageModel(tokenizer=tokenizer, n=n, storage="array")
+        split_lm.fit(CORPUS[:37])
+        split_lm.fit(CORPUS[37:])
+        check_same_predictions(dict_lm, split_lm, contexts, "array, fitted in two calls")
+
+        # Counting in worker processes must match the serial counts exactly
+        parallel_lm = NgramLanguageModel(tokenizer=tokenizer, n=n, storage="array")
+        parallel_lm.fit(CORPUS, n_jobs=2, shard_size=7)
+        check_same_predictions(dict_lm, parallel_lm, contexts, "array, fitted with n_jobs=2")
+
+        # Saved models are memory-mapped back, in this process and in a new one
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"lm{n}.bin")
+            dict_lm.save(path)
+            loaded_lm = NgramLanguageModel.load(path, tokenizer)
+            check_same_predictions(dict_lm, loaded_lm, contexts, "saved and loaded")
+
+            expected = [dict_lm.predict_next_word(list(context)) for context in contexts]
+            assert predictions_in_fresh_process(path, [list(context) for context in contexts]) == expected, \
+                "loaded in a fresh process: distributions differ"
+            print("loaded in a fresh process: identical.")
+
+            # Smoothed models map their saved smoothing tables instead of rebuilding them
+            for smoothing in ("kneser_ney", "stupid_backoff"):
+                smoothed_lm = NgramLanguageModel(tokenizer=tokenizer, n=n, smoothing=smoothing)
+                smoothed_lm.fit(CORPUS)
+                smoothed_lm.save(path)
+                loaded_lm = NgramLanguageModel.load(path, tokenizer)
+                scorer = loaded_lm._scorers[smoothing]
+                assert not any(weights.flags.writeable for weights in scorer.backoff_weights), \
+                    f"{smoothing}: smoothing tables were rebuilt instead of mapped"
+                check_same_predictions(smoothed_lm, loaded_lm, contexts, f"{smoothing}, saved and loaded")
+                assert all(loaded_lm.score(document) == smoothed_lm.score(document) for document in CORPUS[:5])
+
+
+if __name__ == "__main__":
+    main()
@@ -58,6 +58,19 @@ def main():
     print(f"Seed: '{seed_text_long}'")
     print(f"Generated: '{generated_text_long}'")
 
+    # 6. Test smoothed scoring on held-out text
+    print("\n--- Smoothed Scoring (Kneser-Ney) ---")
+    held_out = ["The lazy fox barks.", "A clever dog jumps."]
+    for sentence in held_out:
+        print(f"log P('{sentence}') = {lm.score(sentence):.3f}")
+    print(f"Perplexity on held-out sentences: {lm.perplexity(held_out):.3f}")
+
+    smoothed_lm = NgramLanguageModel(tokenizer=tokenizer, n=3, smoothing="kneser_ney")
+    smoothed_lm.fit(corpus)
+    print("\nTrigram Kneser-Ney, unseen context ['lazy', 'fox'] (top 3):")
+    predictions = smoothed_lm.predict_next_word(["lazy", "fox"])
+    pprint.pprint(sorted(predictions.items(), key=lambda item: item[1], reverse=True)[:3])
+
 
 if __name__ == "__main__":
     main()